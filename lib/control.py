@@ -0,0 +1,305 @@
+# local control endpoint for a running instance
+#
+# a running instance (either `start` or `daemon`) listens on a Unix domain
+# socket in the application data directory, so that scripts can send
+# commands to the scheduler without the GUI: the protocol is line based, and
+# each request is a JSON object on a single line, such as
+#
+#   {"cmd": "trigger", "name": "MyEvent", "id": 1}
+#
+# to which the server replies with a JSON object on a single line, that
+# contains the same `id` (if any) and either `"ok": true` along with an
+# optional `result`, or `"ok": false` and an `error` message; requests are
+# handled in order, and many of them can be sent over the same connection
+# without waiting for the replies. By default the reply only tells whether
+# the command could be sent: with `"wait": true` (and an optional `timeout`
+# in seconds) it is delayed until the scheduler acknowledges the command,
+# and the `result` is then the message that acknowledged it. The socket is only accessible by the
+# user that owns the application data directory.
+
+import os
+import json
+import socket
+
+from threading import Thread, Lock
+
+
+# maximum number of connections waiting to be accepted
+_CONTROL_BACKLOG = 8
+
+# maximum number of bytes read from a connection at once
+_CONTROL_READ_SIZE = 65536
+
+
+# commands that require the name of an item, mapped to wrapper methods
+_NAMED_COMMANDS = {
+    "trigger": "whenever_trigger",
+    "suspend": "whenever_suspend_condition",
+    "unsuspend": "whenever_resume_condition",
+}
+
+# commands without arguments, mapped to wrapper methods
+_SIMPLE_COMMANDS = {
+    "pause": "whenever_pause",
+    "resume": "whenever_resume",
+    "reload": "whenever_reload_configuration",
+}
+
+# all commands that are sent to the scheduler, mapped to the actual commands
+# understood by the scheduler, used when the reply waits for the outcome
+_SCHEDULER_COMMANDS = {
+    "pause": "pause",
+    "resume": "resume",
+    "reload": "configure",
+    "trigger": "trigger",
+    "suspend": "suspend_condition",
+    "unsuspend": "resume_condition",
+    "reset": "reset_conditions",
+}
+
+# the history query parameters accepted in requests
+_HISTORY_PARAMS = ["task", "trigger", "success", "since", "until", "limit", "offset"]
+
+
+# whether or not the platform supports the control endpoint
+def control_available() -> bool:
+    return hasattr(socket, "AF_UNIX")
+
+
+# a history entry in a form that can be converted to JSON
+def _history_entry(entry: dict) -> dict:
+    result = dict(entry)
+    if result.get("duration") is not None:
+        result["duration"] = result["duration"].total_seconds()
+    return result
+
+
+class ControlServer(object):
+
+    def __init__(self, wrapper, path: str):
+        self._wrapper = wrapper
+        self._path = path
+        self._socket = None
+        self._thread = None
+        self._connections = set()
+        self._mutex = Lock()
+
+    # the command to send to the scheduler for a request that waits for the
+    # outcome: the scheduler command, the item name and the timeout
+    def _command(self, cmd: str, name: str | None, request: dict) -> tuple:
+        timeout = request.get("timeout")
+        if timeout is not None and (
+            not isinstance(timeout, (int, float)) or timeout <= 0
+        ):
+            raise ValueError("invalid timeout")
+        return _SCHEDULER_COMMANDS[cmd], name, timeout
+
+    # perform a single request and return the reply, or the command to send
+    # when the request asks to wait for its outcome
+    def _perform(self, request) -> dict | tuple:
+        if not isinstance(request, dict):
+            raise ValueError("request must be an object")
+        cmd = request.get("cmd")
+        wait = bool(request.get("wait"))
+        if cmd in _SIMPLE_COMMANDS:
+            if wait:
+                return self._command(cmd, None, request)
+            return {"ok": getattr(self._wrapper, _SIMPLE_COMMANDS[cmd])()}
+        elif cmd in _NAMED_COMMANDS:
+            name = request.get("name")
+            if not isinstance(name, str) or not name or " " in name:
+                raise ValueError("invalid name")
+            if wait:
+                return self._command(cmd, name, request)
+            return {"ok": getattr(self._wrapper, _NAMED_COMMANDS[cmd])(name)}
+        elif cmd == "reset":
+            names = request.get("names") or []
+            if not isinstance(names, list) or not all(
+                isinstance(x, str) and x and " " not in x for x in names
+            ):
+                raise ValueError("invalid names")
+            if wait:
+                return self._command(cmd, " ".join(names), request)
+            return {"ok": self._wrapper.whenever_reset_conditions(names)}
+        elif cmd == "history":
+            params = dict((k, request[k]) for k in _HISTORY_PARAMS if k in request)
+            entries = self._wrapper.history().query(**params)
+            return {"ok": True, "result": list(_history_entry(x) for x in entries)}
+        else:
+            raise ValueError("unknown command: %s" % cmd)
+
+    # perform the requests in a batch of lines and return the encoded
+    # replies: consecutive commands that wait for their outcome are sent to
+    # the scheduler with a single write, and only then awaited; any other
+    # request is performed after the commands that precede it have been
+    # acknowledged, so that its outcome reflects them and the order is kept
+    def _batch(self, lines: list[bytes]) -> bytes:
+        replies = []
+        futures = {}
+        group = []
+        group_timeout = None
+
+        def send():
+            if group:
+                submitted = self._wrapper.submit_commands(
+                    list((command, name) for _, command, name in group),
+                    group_timeout,
+                )
+                for (index, _, _), future in zip(group, submitted):
+                    futures[index] = future
+                group.clear()
+
+        # send the commands still in the group and wait for all of them: the
+        # wait is bounded by the acknowledgement timeout
+        def settle():
+            send()
+            for index, future in futures.items():
+                reply = replies[index]
+                try:
+                    result = future.result()
+                    reply["ok"] = True
+                    reply["result"] = result
+                except Exception as e:
+                    reply["ok"] = False
+                    reply["error"] = str(e) or e.__class__.__name__
+            futures.clear()
+
+        for line in lines:
+            reply = {}
+            replies.append(reply)
+            try:
+                request = json.loads(line)
+                if isinstance(request, dict) and "id" in request:
+                    reply["id"] = request["id"]
+                wait = isinstance(request, dict) and bool(request.get("wait"))
+                if not wait:
+                    settle()
+                outcome = self._perform(request)
+                if wait:
+                    command, name, timeout = outcome
+                    if timeout != group_timeout:
+                        send()
+                        group_timeout = timeout
+                    group.append((len(replies) - 1, command, name))
+                else:
+                    reply.update(outcome)
+            except Exception as e:
+                reply["ok"] = False
+                reply["error"] = str(e)
+        settle()
+        return b"".join(json.dumps(x).encode("utf-8") + b"\n" for x in replies)
+
+    # serve a connection: all requests that are received at once are handled
+    # as a batch, and their replies are sent back together; consecutive
+    # commands in a batch are sent before waiting for any of them to be
+    # acknowledged
+    def _serve(self, conn):
+        pending = b""
+        try:
+            while True:
+                chunk = conn.recv(_CONTROL_READ_SIZE)
+                if not chunk:
+                    break
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                replies = self._batch(list(x for x in lines if x.strip()))
+                if replies:
+                    conn.sendall(replies)
+            if pending.strip():
+                conn.sendall(self._batch([pending]))
+        except OSError:
+            pass
+        finally:
+            with self._mutex:
+                self._connections.discard(conn)
+            conn.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._socket.accept()  # type: ignore
+            except OSError:
+                break
+            with self._mutex:
+                self._connections.add(conn)
+            Thread(target=self._serve, args=[conn], daemon=True).start()
+
+    # start listening: a socket left behind by an instance that did not exit
+    # cleanly is removed, while a socket in use is left alone
+    def start(self) -> bool:
+        if not control_available():
+            return False
+        if os.path.exists(self._path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                    s.connect(self._path)
+                return False
+            except OSError:
+                os.unlink(self._path)
+        # connecting requires write access to the socket, which is not given
+        # to other users by the default permissions until these are changed
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.bind(self._path)
+            os.chmod(self._path, 0o600)
+            self._socket.listen(_CONTROL_BACKLOG)
+        except OSError:
+            self._socket.close()
+            self._socket = None
+            raise
+        self._thread = Thread(target=self._accept, name="control", daemon=True)
+        self._thread.start()
+        return True
+
+    # stop listening, close all connections and remove the socket
+    def stop(self):
+        if self._socket is not None:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._socket.close()
+            self._socket = None
+            with self._mutex:
+                connections = list(self._connections)
+            for conn in connections:
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+
+
+# send a sequence of requests over a single connection and return the
+# replies in the same order: requests are written by a separate thread, so
+# that long batches never block on replies that have not been read yet
+def send_requests(path: str, requests: list[dict]) -> list[dict]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(path)
+
+        def write():
+            try:
+                with s.makefile("wb") as wfile:
+                    for request in requests:
+                        wfile.write(json.dumps(request).encode("utf-8") + b"\n")
+                s.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+        writer = Thread(target=write, daemon=True)
+        writer.start()
+        replies = []
+        with s.makefile("rb") as rfile:
+            for line in rfile:
+                replies.append(json.loads(line))
+        writer.join()
+        return replies
+
+
+__all__ = ["ControlServer", "control_available", "send_requests"]
+
+
+# end.
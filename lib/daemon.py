@@ -0,0 +1,96 @@
+# headless resident application: implements the `daemon` command
+#
+# the scheduler wrapper, the logger and the task history are the same used
+# by the tray application, but no GUI toolkit is loaded: the main thread just
+# waits for signals, namely SIGTERM and SIGINT to shut down the scheduler and
+# exit, SIGHUP to reload the configuration and SIGUSR1 to log the resident
+# memory; signal handlers only record the request, which is then performed
+# by the main thread, and the daemon also exits when the scheduler does
+
+import signal
+
+from threading import Event
+
+from .utility import get_logger, log_resident_memory
+
+
+# seconds between two checks that the scheduler is still running
+_DAEMON_CHECK_SECONDS = 1.0
+
+
+class Daemon(object):
+
+    def __init__(self, wrapper):
+        self._wrapper = wrapper
+        self._wake = Event()
+        self._stop = False
+        self._reload = False
+        self._report = False
+        self._log = get_logger().context().use(emitter="FRONTEND")
+
+    def _on_stop(self, *_):
+        self._stop = True
+        self._wake.set()
+
+    def _on_reload(self, *_):
+        self._reload = True
+        self._wake.set()
+
+    def _on_report(self, *_):
+        self._report = True
+        self._wake.set()
+
+    def _install_handlers(self):
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        # these signals are not available on Windows
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._on_reload)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self._on_report)
+
+    # run until a termination signal is received or the scheduler exits, and
+    # return whether or not the scheduler was shut down on request
+    def run(self) -> bool:
+        self._install_handlers()
+        log_resident_memory("started")
+        while True:
+            self._wake.wait(_DAEMON_CHECK_SECONDS)
+            self._wake.clear()
+            if self._stop:
+                self._log.use(
+                    level=self._log.LEVEL_INFO,
+                    when=self._log.WHEN_END,
+                    action="shutdown",
+                    status=self._log.STATUS_MSG,
+                ).log("termination requested")
+                self._wrapper.whenever_exit()
+                return True
+            if self._reload:
+                self._reload = False
+                self._log.use(
+                    level=self._log.LEVEL_INFO,
+                    when=self._log.WHEN_PROC,
+                    action="reload",
+                    status=self._log.STATUS_MSG,
+                ).log("reloading configuration")
+                self._wrapper.whenever_reload_configuration()
+            if self._report:
+                self._report = False
+                log_resident_memory("running")
+            pipe = self._wrapper.pipe()
+            if pipe is None or pipe.poll() is not None:
+                self._log.use(
+                    level=self._log.LEVEL_ERROR,
+                    when=self._log.WHEN_END,
+                    action="shutdown",
+                    status=self._log.STATUS_ERR,
+                ).log("the scheduler is not running anymore")
+                self._wrapper.collect_exited()
+                return False
+
+
+__all__ = ["Daemon"]
+
+
+# end.
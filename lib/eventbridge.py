@@ -0,0 +1,129 @@
+# event bridge between worker threads and the Tk main loop
+#
+# Tk is not thread safe, thus virtual events cannot be generated from the
+# threads that read the scheduler output or that run the tray icon: these
+# threads post events to a queue instead, which is drained by a function
+# that the main loop runs periodically. Events that report a state (such as
+# busy/not busy) are coalesced, so that only the latest state of each kind
+# is delivered when the state changed several times between two runs of the
+# pump; the events are then queued to Tk, and handled by the main loop as
+# any other event (thus also while a form runs its own modal loop). Events
+# posted from the main thread are generated immediately, as before.
+
+from queue import SimpleQueue, Empty
+from threading import Lock, get_ident
+from time import perf_counter
+
+from .repocfg import AppConfig
+
+
+# milliseconds between two runs of the pump
+_EVENT_PUMP_MS: int = AppConfig.get("EVENT_PUMP_MS", 50)  # type: ignore
+
+
+# events that report a state, each mapped to the kind of state it reports
+_STATE_EVENTS = {
+    "<<SchedSetBusy>>": "busy",
+    "<<SchedSetNotBusy>>": "busy",
+    "<<SchedSetPaused>>": "paused",
+    "<<SchedSetNotPaused>>": "paused",
+    "<<HistoryUpdated>>": "history",
+}
+
+
+class EventBridge(object):
+
+    def __init__(self, widget, interval: int = _EVENT_PUMP_MS):
+        self._widget = widget
+        self._interval = max(1, interval)
+        self._thread = get_ident()
+        self._queue = SimpleQueue()
+        self._after = None
+        self._mutex = Lock()
+        self._received = 0
+        self._dispatched = 0
+        self._max_latency = 0.0
+        self._max_stall = 0.0
+        self._last_pump = None
+
+    # post an event: it is generated immediately in the main thread, and
+    # queued for the pump in any other thread
+    def post(self, event: str):
+        if get_ident() == self._thread:
+            with self._mutex:
+                self._received += 1
+                self._dispatched += 1
+            self._widget.event_generate(event)
+        else:
+            self._queue.put((event, perf_counter()))
+
+    # start the pump: must be called in the main thread
+    def start(self):
+        if self._after is None:
+            self._after = self._widget.after(self._interval, self._pump)
+
+    # stop the pump, discarding the events that are still queued
+    def stop(self):
+        if self._after is not None:
+            try:
+                self._widget.after_cancel(self._after)
+            except Exception:
+                pass
+            self._after = None
+
+    # take all queued events, keeping only the latest one of each state kind
+    # in the position where it was posted last; also return how many events
+    # have been taken from the queue
+    def _drain(self) -> tuple[list[tuple[str, float]], int]:
+        events = []
+        latest = {}
+        taken = 0
+        while True:
+            try:
+                event, posted = self._queue.get_nowait()
+            except Empty:
+                break
+            taken += 1
+            kind = _STATE_EVENTS.get(event)
+            if kind is not None:
+                if kind in latest:
+                    events[latest[kind]] = None
+                latest[kind] = len(events)
+            events.append((event, posted))
+        return list(x for x in events if x is not None), taken
+
+    # the pump also measures how late it runs with respect to its interval,
+    # which is the time the main loop was busy doing something else
+    def _pump(self):
+        events, taken = self._drain()
+        now = perf_counter()
+        with self._mutex:
+            if self._last_pump is not None:
+                stall = now - self._last_pump - self._interval / 1000
+                self._max_stall = max(self._max_stall, stall)
+            self._received += taken
+            self._dispatched += len(events)
+            for _, posted in events:
+                self._max_latency = max(self._max_latency, now - posted)
+        for event, _ in events:
+            self._widget.event_generate(event, when="tail")
+        self._last_pump = perf_counter()
+        self._after = self._widget.after(self._interval, self._pump)
+
+    # statistics: number of events received and actually dispatched, the
+    # longest time (in seconds) an event waited before being dispatched, and
+    # the longest delay of the pump, that is, the longest main loop stall
+    def stats(self) -> dict:
+        with self._mutex:
+            return {
+                "received": self._received,
+                "dispatched": self._dispatched,
+                "max_latency": self._max_latency,
+                "max_stall": self._max_stall,
+            }
+
+
+__all__ = ["EventBridge"]
+
+
+# end.
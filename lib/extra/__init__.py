@@ -1,39 +1,175 @@
 # extra items module
 #
-# dynamically load all items in this directory
+# extra items are described by a manifest, that records for each module the
+# signature, the human readable name and the availability of the item that
+# it defines, along with the names of the item and form classes: the modules
+# are only imported to build the manifest, which is then saved in the
+# application data directory, so that on following starts a module is only
+# imported when its item or its form is actually needed; the saved manifest
+# is used as long as the modules, the `whenever` version and options, the
+# platform and the locale are the same as when it was built
 
 import os
+import sys
+import json
 
+from hashlib import blake2s
+from importlib import import_module
 
-# export two dictionaries, one for successfully loaded items/forms and the
-# other for items that could not be loaded and thus will not be enabled
-factories = {}
-not_loaded = {}
 
+# version of the manifest format: manifests with a different one are rebuilt
+_MANIFEST_VERSION = 1
 
-# load all Python modules in the directory, except the ones whose filename
-# begins with an underscore: in this way a `_template.py` module can be put
-# in the directory to actually serve as a template; note that, since all
-# modules should export the `factories()` function, the names of the item
-# and form classes is ininfluent -- if not for default item names in the
-# editor forms; factory class names can also be repeated (for example for
-# items that do the same things on different platforms) since the file name
-# of the module acts as an index, and is necessarily unique
 _basepath = os.path.dirname(__file__)
-for elem in [
-    x[:-3]
-    for x in os.listdir(_basepath)
-    if x.lower().endswith(".py") and not x.startswith("_")
-]:
+
+
+# the extra modules: all Python modules in the directory, except the ones
+# whose filename begins with an underscore, so that a `_template.py` module
+# can be put in the directory to actually serve as a template; note that,
+# since all modules should export the `factories()` function, the names of
+# the item and form classes is ininfluent -- if not for default item names
+# in the editor forms; factory class names can also be repeated (for example
+# for items that do the same things on different platforms) since the file
+# name of the module acts as an index, and is necessarily unique
+def module_names() -> list[str]:
+    return sorted(
+        x[:-3]
+        for x in os.listdir(_basepath)
+        if x.lower().endswith(".py") and not x.startswith("_")
+    )
+
+
+# hash of the contents of the modules and of their localized strings
+def _modules_hash() -> str:
+    h = blake2s()
+    for d in (_basepath, os.path.join(_basepath, "i18n")):
+        for name in sorted(os.listdir(d)):
+            if name.lower().endswith(".py"):
+                h.update(name.encode())
+                with open(os.path.join(d, name), "rb") as f:
+                    h.update(blake2s(f.read()).digest())
+    return h.hexdigest()
+
+
+# everything the manifest depends on, besides the system state
+def _manifest_key() -> dict:
+    from ..i18n.strings import which_locale
+    from ..utility import (
+        get_whenever_version,
+        whenever_has_dbus,
+        whenever_has_wmi,
+        whenever_has_lua_sync,
+        whenever_has_lua_httpreq,
+    )
+
+    return {
+        "version": _MANIFEST_VERSION,
+        "platform": sys.platform,
+        "locale": which_locale(),
+        "whenever": get_whenever_version(),
+        "options": [
+            whenever_has_dbus(),
+            whenever_has_wmi(),
+            whenever_has_lua_sync(),
+            whenever_has_lua_httpreq(),
+        ],
+        "modules": _modules_hash(),
+    }
+
+
+# import a module and describe the item it defines
+def _describe(name: str) -> dict | None:
+    from ..items.task import Task
+    from ..items.cond import Condition
+    from ..items.event import Event
+
+    item_class, item_form = import_module("lib.extra.%s" % name).factories()
+    if issubclass(item_class, Task):
+        prefix = "task"
+    elif issubclass(item_class, Condition):
+        prefix = "cond"
+    elif issubclass(item_class, Event):
+        prefix = "event"
+    else:
+        return None
+    return {
+        "module": name,
+        "signature": "%s:%s:%s"
+        % (prefix, item_class.item_type, item_class.item_subtype),
+        "hrtype": item_class.item_hrtype,
+        "available": bool(item_class.available),
+        "item": item_class.__name__,
+        "form": item_form.__name__,
+    }
+
+
+# import all modules to build the manifest
+def _build(key: dict) -> dict:
+    items = []
+    not_loaded = {}
+    for name in module_names():
+        try:
+            entry = _describe(name)
+            if entry is not None:
+                items.append(entry)
+        except Exception as e:
+            not_loaded[name] = str(e)
+    return {"key": key, "items": items, "not_loaded": not_loaded}
+
+
+def _manifest_file() -> str | None:
+    from ..utility import get_extras_manifest_file
+
     try:
-        exec("from lib.extra import %s" % elem)
-        factories[elem] = eval("%s.factories()" % elem)
-    except Exception as e:
-        not_loaded[elem] = e
+        return get_extras_manifest_file()
+    except Exception:
+        return None
+
+
+_manifest = None
+
+
+# return the manifest, reading it from the application data directory when
+# it is still valid, and building and saving it otherwise or on request
+def get_manifest(rebuild: bool = False) -> dict:
+    global _manifest
+    if _manifest is not None and not rebuild:
+        return _manifest
+    key = _manifest_key()
+    filename = _manifest_file()
+    if filename and not rebuild:
+        try:
+            with open(filename) as f:
+                manifest = json.load(f)
+            if manifest.get("key") == key:
+                _manifest = manifest
+                return _manifest
+        except (OSError, ValueError):
+            pass
+    _manifest = _build(key)
+    if filename:
+        try:
+            tempname = filename + ".tmp"
+            with open(tempname, "w") as f:
+                json.dump(_manifest, f, indent=1)
+            os.replace(tempname, filename)
+        except OSError:
+            pass
+    return _manifest
+
+
+# the description of all successfully loaded items, and the modules that
+# could not be loaded along with the reason
+def manifest_items() -> list[dict]:
+    return get_manifest()["items"]
+
+
+def not_loaded() -> dict:
+    return get_manifest()["not_loaded"]
 
 
-# only export the useful objects, that is, the two dictionaries
-__all__ = ["factories", "not_loaded"]
+# only export the useful functions
+__all__ = ["get_manifest", "manifest_items", "not_loaded", "module_names"]
 
 
 # end
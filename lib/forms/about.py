@@ -3,14 +3,13 @@
 import tkinter as tk
 import ttkbootstrap as ttk
 from tkhtmlview import HTMLLabel
-from PIL import ImageTk
 
 from ..i18n.strings import *
 from ..icons import APP_ICON64 as APP_BITMAP
 from .ui import *
 
 from ..repocfg import AppConfig
-from ..utility import get_whenever_version, get_image
+from ..utility import get_whenever_version, get_ui_image
 
 
 # the last paragraphs are to fiull the background in gray
@@ -51,7 +50,7 @@ class AboutBox(ApplicationForm):
             (BBOX_CLOSE,),
             main
         )
-        self._image = ImageTk.PhotoImage(get_image(APP_BITMAP))
+        self._image = get_ui_image(APP_BITMAP)
 
         # build the UI: build widgets, arrange them in the box, bind data
 
@@ -6,7 +6,6 @@ import os
 import tkinter as tk
 import ttkbootstrap as ttk
 import ttkbootstrap.constants as ttkc
-from ttkbootstrap_icons_mat import MatIcon as Icons
 
 from ..i18n.strings import *
 from .ui import *
@@ -22,6 +21,7 @@ from ..configurator.writer import write_whenever_config
 from ..configurator.defaults import *
 
 from .newitem import form_NewItem
+from .cond_mcrt import form_ConfluenceCondition
 
 
 # configuration box class
@@ -70,10 +70,10 @@ class form_Config(ApplicationForm):
         ]
 
         # list box icons
-        self._icon_task = Icons("list-box", size=20, color=CYAN).image
-        self._icon_condition = Icons("arrow-decision", size=20, color=FUCHSIA).image
-        self._icon_event = Icons("lightbulb", size=20, color=YELLOW).image
-        self._icon_unknown = Icons("chat-question", size=20, color=RED).image
+        self._icon_task = mat_icon("list-box", size=20, color=CYAN)
+        self._icon_condition = mat_icon("arrow-decision", size=20, color=FUCHSIA)
+        self._icon_event = mat_icon("lightbulb", size=20, color=YELLOW)
+        self._icon_unknown = mat_icon("chat-question", size=20, color=RED)
 
         # form data
         self._tasks = {}
@@ -154,27 +154,23 @@ class form_Config(ApplicationForm):
         # items pane
         # item list box
         l_items = ttk.Label(area_items, text=UI_FORM_ITEMS_SC)
-        # build a scrolled frame for the treeview
-        sftv_items = ttk.Frame(area_items)
-        tv_items = ttk.Treeview(
-            sftv_items,
-            columns=("name", "type", "signature"),
-            displaycolumns=("name", "type"),
-            show="tree headings",
-            bootstyle=ttkc.SECONDARY,
+        # the list only builds the visible rows, and fills them on demand
+        tv_items = VirtualTreeview(
+            area_items,
+            columns=[
+                {"text": UI_FORM_LHD_NAME, "width": 200, "anchor": tk.W},
+                {"text": UI_FORM_LHD_TYPE, "width": 200, "anchor": tk.W},
+            ],
+            count=lambda: len(self._itemlistentries),
+            fetch=lambda offset, count: self._itemlistentries[offset : offset + count],
+            render=self._item_render,
+            tree_width=40,
             height=5,
+            bootstyle=ttkc.SECONDARY,
         )
-        tv_items.column("#0", anchor=tk.CENTER, width=40, stretch=tk.NO)
-        tv_items.heading("#0", anchor=tk.CENTER, text="")
-        tv_items.heading("name", anchor=tk.W, text=UI_FORM_LHD_NAME)
-        tv_items.heading("type", anchor=tk.W, text=UI_FORM_LHD_TYPE)
-        sb_items = ttk.Scrollbar(sftv_items, orient=tk.VERTICAL, command=tv_items.yview)
-        tv_items.configure(yscrollcommand=sb_items.set)
-        tv_items.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        sb_items.pack(side=tk.RIGHT, fill=tk.Y)
 
         l_items.grid(row=20, column=0, sticky=tk.W, padx=PAD, pady=PAD)
-        sftv_items.grid(row=21, column=0, sticky=tk.NSEW, padx=PAD, pady=PAD)
+        tv_items.grid(row=21, column=0, sticky=tk.NSEW, padx=PAD, pady=PAD)
 
         # expand appropriate sections
         area_items.rowconfigure(index=21, weight=1)
@@ -193,7 +189,7 @@ class form_Config(ApplicationForm):
         self.data_bind("item_selection", tv_items)
 
         # bind double click in list to item editor
-        tv_items.bind("<Double-Button-1>", lambda _: self.edit())
+        tv_items.view.bind("<Double-Button-1>", lambda _: self.edit())
 
         # bind changes to global params so that the _changed flag becomes true
         ck_randChecks.configure(command=self._set_changed)
@@ -245,25 +241,7 @@ class form_Config(ApplicationForm):
 
     # update the form fields according to the associated actual data
     def _updateform(self):
-        self._tv_items.delete(*self._tv_items.get_children())
-        for entry in self._itemlistentries:
-            t = entry[2].split(":", 1)[0]
-            if t == "task":
-                icon = self._icon_task
-            elif t == "cond":
-                icon = self._icon_condition
-            elif t == "event":
-                icon = self._icon_event
-            # the following actually never happens
-            else:
-                icon = self._icon_unknown
-            self._tv_items.insert(
-                "",
-                iid="%s-%s" % (entry[0], entry[2]),
-                image=icon,
-                values=entry,
-                index=tk.END,
-            )
+        self._tv_items.reset()
         self.data_set(
             "scheduler_tick_seconds",
             self._globals["scheduler_tick_seconds"] or DEFAULT_SCHEDULER_TICK_SECONDS,
@@ -277,6 +255,20 @@ class form_Config(ApplicationForm):
             self._globals["tags"]["reset_conditions_on_resume"],
         )
 
+    # icon and displayed values for an entry of the item list
+    def _item_render(self, entry):
+        t = entry[2].split(":", 1)[0]
+        if t == "task":
+            icon = self._icon_task
+        elif t == "cond":
+            icon = self._icon_condition
+        elif t == "event":
+            icon = self._icon_event
+        # the following actually never happens
+        else:
+            icon = self._icon_unknown
+        return icon, entry[:2]
+
     # reset all associated data in the form (does not update fields)
     def _resetdata(self):
         self._tasks = {}
@@ -580,7 +572,7 @@ class form_Config(ApplicationForm):
                     ]
                     form = form_class(list(available_tasks))
                     # this is a special case, which has an extra parameter
-                    if form_class is mcrt.form_ConfluenceCondition:
+                    if isinstance(form, form_ConfluenceCondition):
                         confluent_conds = list(
                             x
                             for x in self._conditions.keys()
@@ -7,11 +7,12 @@ import tkinter as tk
 import ttkbootstrap as ttk
 import ttkbootstrap.constants as ttkc
 
-from ttkbootstrap.widgets import tableview
 from ttkbootstrap.icons import Emoji
 
 from .ui import *
 
+from ..runner.history import OUTCOME_ABANDONED
+
 
 # form class: this form is fixed and will not be derived
 class form_History(ApplicationForm):
@@ -28,10 +29,12 @@ class form_History(ApplicationForm):
         self._icon_fail = Emoji.get("CROSS MARK")
         self._icon_unknown = Emoji.get("BLACK QUESTION MARK ORNAMENT")
 
-        # form data
+        # form data: the sequence number of the most recent entry shown is
+        # kept, so that only newer entries have to be retrieved and added
         self._wrapper = wrapper
         self._history = []
-        self.set_history(self._wrapper.get_history())
+        self._last_seq, entries = self._wrapper.get_history_since(0)
+        self.set_history(entries)
 
         # build the UI: build widgets, arrange them in the box, bind data
 
@@ -82,18 +85,17 @@ class form_History(ApplicationForm):
             }
         )
 
-        tab_history = tableview.Tableview(
+        # only the visible rows are built, and they are filled on demand
+        tab_history = VirtualTreeview(
             area,
-            coldata=cols,
-            paginated=False,
-            yscrollbar=True,
-            disable_right_click=True,
+            columns=cols,
+            count=self._history_count,
+            fetch=self._history_rows,
+            render=self._history_render,
+            height=10,
             bootstyle=ttkc.SECONDARY,
         )
 
-        # this is a hack because the horizontal scrollbar is not documented
-        tab_history.hbar.pack_forget()
-
         # arrange items in the grid
         l_history.grid(row=0, column=0, sticky=tk.W, padx=PAD, pady=PAD)
         tab_history.grid(row=1, column=0, sticky=tk.NSEW, padx=PAD, pady=PAD)
@@ -110,38 +112,67 @@ class form_History(ApplicationForm):
 
         self._updateform()
 
-    def set_history(self, history):
-        h = list(
-            (
-                [
-                    x["time"][:-7].replace("T", " "),
-                    x["task"],
-                    x["trigger"],
-                    ("%.2fs" % x["duration"].total_seconds()).ljust(7),
-                    x["message"],
-                ],
-                x["success"],
-            )
-            for x in history
+    # data source for the list: entries are kept oldest first, so that new
+    # ones can be appended, and are shown most recent first
+    def _history_count(self):
+        return len(self._history)
+
+    def _history_rows(self, offset, count):
+        end = max(0, len(self._history) - offset)
+        start = max(0, end - count)
+        rows = self._history[start:end]
+        rows.reverse()
+        return rows
+
+    # rows are only formatted when they are displayed
+    def _history_render(self, entry):
+        return (
+            None,
+            [
+                self._outcome_icon(entry["success"]),
+                entry["time"][:-7].replace("T", " "),
+                entry["task"],
+                entry["trigger"],
+                (
+                    "%.2fs" % entry["duration"].total_seconds()
+                    if entry["duration"] is not None
+                    else "-"
+                ).ljust(7),
+                entry["message"],
+            ],
         )
-        h.reverse()
-        self._history = h
 
-    def _updateform(self):
-        self._tv_history.delete_rows()
-        for entry, outcome in self._history:
-            icon = (
-                self._icon_ok
-                if outcome == "OK"
-                else self._icon_unknown if outcome == "IND" else self._icon_fail
+    def _outcome_icon(self, outcome):
+        return (
+            self._icon_ok
+            if outcome == "OK"
+            else (
+                self._icon_unknown
+                if outcome in ("IND", OUTCOME_ABANDONED)
+                else self._icon_fail
             )
-            entry.insert(0, icon)
-            self._tv_history.insert_row("end", values=entry)
+        )
+
+    def set_history(self, history):
+        self._history = list(history)
 
-    # reload history data when the `reload` button is clicked
+    def _updateform(self):
+        self._tv_history.reset()
+
+    # add the entries that arrived after the last one shown on top of the
+    # list: only the visible rows are redrawn, whatever the history size
+    def update_history(self):
+        if not self._dialog.winfo_exists():
+            return
+        seq, entries = self._wrapper.get_history_since(self._last_seq)
+        self._last_seq = seq
+        if entries:
+            self._history.extend(entries)
+            self._tv_history.prepended(len(entries))
+
+    # only add new entries when the `reload` button is clicked
     def reload(self):
-        self.set_history(self._wrapper.get_history())
-        self._updateform()
+        self.update_history()
         return super().reload()
 
 
@@ -5,9 +5,6 @@
 
 import tkinter as tk
 import ttkbootstrap as ttk
-from ttkbootstrap_icons_mat import MatIcon as Icons
-
-from PIL import ImageTk
 
 from ..i18n.strings import *  # type: ignore
 from ..icons import APP_ICON64 as APP_BITMAP
@@ -16,7 +13,7 @@ from .colors import *  # type: ignore
 
 
 from ..repocfg import AppConfig
-from ..utility import get_image
+from ..utility import get_ui_image
 
 
 # default UI values
@@ -49,7 +46,7 @@ class _btn_MenuEntry(ttk.Button):
 
 class BtnAbout(_btn_MenuEntry):
     def __init__(self, master, text=BTN_ABOUT_D, command=None, enabled=True):
-        icon = Icons("information", color=YELLOW).image
+        icon = mat_icon("information", color=YELLOW)
         super().__init__(
             master,
             text=text,
@@ -61,7 +58,7 @@ class BtnAbout(_btn_MenuEntry):
 
 class BtnConfig(_btn_MenuEntry):
     def __init__(self, master, text=BTN_CONFIG_D, command=None, enabled=True):
-        icon = Icons("cog", color=MDGRAY).image
+        icon = mat_icon("cog", color=MDGRAY)
         super().__init__(
             master,
             text=text,
@@ -73,7 +70,7 @@ class BtnConfig(_btn_MenuEntry):
 
 class BtnPause(_btn_MenuEntry):
     def __init__(self, master, text=BTN_PAUSE, command=None, enabled=True):
-        icon = Icons("pause", color=LTGRAY).image
+        icon = mat_icon("pause", color=LTGRAY)
         super().__init__(
             master,
             text=text,
@@ -85,7 +82,7 @@ class BtnPause(_btn_MenuEntry):
 
 class BtnResume(_btn_MenuEntry):
     def __init__(self, master, text=BTN_RESUME, command=None, enabled=True):
-        icon = Icons("play", color=GREEN).image
+        icon = mat_icon("play", color=GREEN)
         super().__init__(
             master,
             text=text,
@@ -97,7 +94,7 @@ class BtnResume(_btn_MenuEntry):
 
 class BtnReset(_btn_MenuEntry):
     def __init__(self, master, text=BTN_RESETCONDS, command=None, enabled=True):
-        icon = Icons("restore-alert", color=RED).image
+        icon = mat_icon("restore-alert", color=RED)
         super().__init__(
             master,
             text=text,
@@ -109,7 +106,7 @@ class BtnReset(_btn_MenuEntry):
 
 class BtnHistory(_btn_MenuEntry):
     def __init__(self, master, text=BTN_HISTORY_D, command=None, enabled=True):
-        icon = Icons("format-list-bulleted", color=LTGRAY).image
+        icon = mat_icon("format-list-bulleted", color=LTGRAY)
         super().__init__(
             master,
             text=text,
@@ -121,7 +118,7 @@ class BtnHistory(_btn_MenuEntry):
 
 class BtnLeave(_btn_MenuEntry):
     def __init__(self, master, text=BTN_EXIT, command=None, enabled=True):
-        icon = Icons("stop-circle", color=FUCHSIA).image
+        icon = mat_icon("stop-circle", color=FUCHSIA)
         super().__init__(
             master,
             text=text,
@@ -145,7 +142,7 @@ class form_MenuBox(ApplicationForm):
         super().__init__(
             UI_TITLE_MENU, size, None, (BBOX_CANCEL,), main
         )
-        self._image = ImageTk.PhotoImage(get_image(APP_BITMAP))
+        self._image = get_ui_image(APP_BITMAP)
         self._app = app
 
         # build the UI: build widgets, arrange them in the box, bind data
@@ -10,7 +10,7 @@ from ttkbootstrap_icons_mat import MatIcon as Icons
 
 from typing import Callable, Any
 
-from ..utility import get_icon, get_appicon, get_tkroot
+from ..utility import get_icon, get_appicon, get_tkroot, get_cached_ui_image
 from .colors import *  # type: ignore
 
 
@@ -53,6 +53,19 @@ BUTTON_STANDARD_WIDTH_SMALL = 8
 BUTTON_STANDARD_WIDTH_LARGE = 31
 
 
+# a Material Design icon, shared by all forms: rendering a glyph is rather
+# expensive, and the same icons appear in most forms and in every instance
+def mat_icon(name: str, size: int | None = None, color: str | None = None):
+    theme = ttk.Style().theme_use()
+
+    def build():
+        if size is None:
+            return Icons(name, color=color).image
+        return Icons(name, size=size, color=color).image
+
+    return get_cached_ui_image(("mat", name, size, color, theme), build)
+
+
 # common settings for all standard buttons
 class _btn_Base(ttk.Button):
     def __init__(self, master, text, icon, command, enabled):
@@ -117,7 +130,7 @@ class _btn_MenuEntry(ttk.Button):
 # standard buttons
 class BtnOK(_btn_Base):
     def __init__(self, master, text=BTN_OK, command=None, enabled=True):
-        icon = Icons("check", color=GREEN).image
+        icon = mat_icon("check", color=GREEN)
         super().__init__(
             master,
             text=text,
@@ -129,7 +142,7 @@ class BtnOK(_btn_Base):
 
 class BtnCancel(_btn_Base):
     def __init__(self, master, text=BTN_CANCEL, command=None, enabled=True):
-        icon = Icons("cancel", color=RED).image
+        icon = mat_icon("cancel", color=RED)
         super().__init__(
             master,
             text=text,
@@ -141,7 +154,7 @@ class BtnCancel(_btn_Base):
 
 class BtnClose(_btn_Base):
     def __init__(self, master, text=BTN_CLOSE, command=None, enabled=True):
-        icon = Icons("close", color=ORANGE).image
+        icon = mat_icon("close", color=ORANGE)
         super().__init__(
             master,
             text=text,
@@ -153,7 +166,7 @@ class BtnClose(_btn_Base):
 
 class BtnExit(_btn_Base):
     def __init__(self, master, text=BTN_EXIT, command=None, enabled=True):
-        icon = Icons("exit-run", color=RED).image
+        icon = mat_icon("exit-run", color=RED)
         super().__init__(
             master,
             text=text,
@@ -165,7 +178,7 @@ class BtnExit(_btn_Base):
 
 class BtnAdd(_btn_Base):
     def __init__(self, master, text=BTN_ADD, command=None, enabled=True):
-        icon = Icons("plus-box", color=YELLOW).image
+        icon = mat_icon("plus-box", color=YELLOW)
         super().__init__(
             master,
             text=text,
@@ -177,7 +190,7 @@ class BtnAdd(_btn_Base):
 
 class BtnRemove(_btn_Base):
     def __init__(self, master, text=BTN_REMOVE, command=None, enabled=True):
-        icon = Icons("minus-box", color=RED).image
+        icon = mat_icon("minus-box", color=RED)
         super().__init__(
             master,
             text=text,
@@ -189,7 +202,7 @@ class BtnRemove(_btn_Base):
 
 class BtnDelete(_btn_Base):
     def __init__(self, master, text=BTN_DELETE, command=None, enabled=True):
-        icon = Icons("trash-can", color=LTGRAY).image
+        icon = mat_icon("trash-can", color=LTGRAY)
         super().__init__(
             master,
             text=text,
@@ -201,7 +214,7 @@ class BtnDelete(_btn_Base):
 
 class BtnLoad(_btn_Base):
     def __init__(self, master, text=BTN_LOAD, command=None, enabled=True):
-        icon = Icons("folder", color=GREEN).image
+        icon = mat_icon("folder", color=GREEN)
         super().__init__(
             master,
             text=text,
@@ -213,7 +226,7 @@ class BtnLoad(_btn_Base):
 
 class BtnSave(_btn_Base):
     def __init__(self, master, text=BTN_SAVE, command=None, enabled=True):
-        icon = Icons("floppy", color=CYAN).image
+        icon = mat_icon("floppy", color=CYAN)
         super().__init__(
             master,
             text=text,
@@ -225,7 +238,7 @@ class BtnSave(_btn_Base):
 
 class BtnNew(_btn_Base):
     def __init__(self, master, text=BTN_NEW, command=None, enabled=True):
-        icon = Icons("file", color=WHITE).image
+        icon = mat_icon("file", color=WHITE)
         super().__init__(
             master,
             text=text,
@@ -237,7 +250,7 @@ class BtnNew(_btn_Base):
 
 class BtnEdit(_btn_Base):
     def __init__(self, master, text=BTN_EDIT, command=None, enabled=True):
-        icon = Icons("file-edit", color=YELLOW).image
+        icon = mat_icon("file-edit", color=YELLOW)
         super().__init__(
             master,
             text=text,
@@ -249,7 +262,7 @@ class BtnEdit(_btn_Base):
 
 class BtnModify(_btn_Base):
     def __init__(self, master, text=BTN_MODIFY, command=None, enabled=True):
-        icon = Icons("pencil", color=YELLOW).image
+        icon = mat_icon("pencil", color=YELLOW)
         super().__init__(
             master,
             text=text,
@@ -261,7 +274,7 @@ class BtnModify(_btn_Base):
 
 class BtnReset(_btn_Base):
     def __init__(self, master, text=BTN_RESET, command=None, enabled=True):
-        icon = Icons("power-cycle", color=RED).image
+        icon = mat_icon("power-cycle", color=RED)
         super().__init__(
             master,
             text=text,
@@ -273,7 +286,7 @@ class BtnReset(_btn_Base):
 
 class BtnReload(_btn_Base):
     def __init__(self, master, text=BTN_RELOAD, command=None, enabled=True):
-        icon = Icons("reload", color=GREEN).image
+        icon = mat_icon("reload", color=GREEN)
         super().__init__(
             master,
             text=text,
@@ -352,6 +365,231 @@ class MessageBox(object):
         return True if dialog.result == BTN_OK else False
 
 
+# virtual list: a tree view that only holds as many rows as can be displayed,
+# and fills them on demand with the rows provided by a data source, so that
+# memory use and drawing time do not depend on the amount of data; the data
+# source is given as a pair of functions: `count()` returns the total number
+# of rows, and `fetch(offset, count)` returns a list of at most `count` rows
+# starting at `offset`, while `render(row)` converts a row into a pair made
+# of the image to show in the tree column (or None) and the list of values
+# to show in the other columns; the columns are specified as a list of
+# dictionaries containing the `text`, `width`, `anchor`, and optionally the
+# `stretch` keys, and when `tree_width` is set an image column is shown
+class VirtualTreeview(ttk.Frame):
+
+    def __init__(
+        self,
+        master,
+        columns: list[dict],
+        count: Callable[[], int],
+        fetch: Callable[[int, int], list],
+        render: Callable[[Any], tuple[Any, list]],
+        tree_width: int | None = None,
+        height: int = 5,
+        bootstyle="",
+    ):
+        super().__init__(master)
+        self._count = count
+        self._fetch = fetch
+        self._render = render
+        self._offset = 0
+        self._rows = []
+        self._slots = 0
+        self._selected = None
+        self._on_select = None
+        names = list("c%s" % n for n in range(len(columns)))
+        self._tv = ttk.Treeview(
+            self,
+            columns=names,
+            show="tree headings" if tree_width else "headings",
+            selectmode=tk.BROWSE,
+            bootstyle=bootstyle,
+            height=height,
+        )
+        if tree_width:
+            self._tv.column("#0", anchor=tk.CENTER, width=tree_width, stretch=tk.NO)
+            self._tv.heading("#0", anchor=tk.CENTER, text="")
+        for name, col in zip(names, columns):
+            anchor = col.get("anchor", tk.W)
+            self._tv.column(
+                name,
+                anchor=anchor,
+                width=col.get("width", 100),
+                stretch=col.get("stretch", True),
+            )
+            self._tv.heading(name, anchor=anchor, text=col.get("text", ""))
+        self._sb = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._yview)
+        self._tv.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self._sb.pack(side=tk.RIGHT, fill=tk.Y)
+        # the tree view never scrolls by itself: all scrolling is done by
+        # changing the offset of the first displayed row in the data source
+        self._tv.bind("<Configure>", lambda _: self._resize())
+        self._tv.bind("<<TreeviewSelect>>", lambda _: self._store_selection())
+        self._tv.bind("<MouseWheel>", self._wheel)
+        self._tv.bind("<Button-4>", lambda _: self._scroll(-3))
+        self._tv.bind("<Button-5>", lambda _: self._scroll(3))
+        self._tv.bind("<Up>", lambda _: self._move_selection(-1))
+        self._tv.bind("<Down>", lambda _: self._move_selection(1))
+        self._tv.bind("<Prior>", lambda _: self._move_selection(-self._page()))
+        self._tv.bind("<Next>", lambda _: self._move_selection(self._page()))
+        self._tv.bind("<Home>", lambda _: self._move_selection(-self._count()))
+        self._tv.bind("<End>", lambda _: self._move_selection(self._count()))
+
+    # the underlying tree view, for instance to bind events to rows
+    @property
+    def view(self) -> ttk.Treeview:
+        return self._tv
+
+    # number of rows that fit in the visible area: the height of a row is
+    # only known once one is displayed, and until then a single one is used
+    def _fitting_rows(self) -> int:
+        if self._slots > 0:
+            bbox = self._tv.bbox("r0")
+            if bbox:
+                _, y, _, h = bbox
+                if h > 0:
+                    return max(1, (self._tv.winfo_height() - y) // h)
+        return 1
+
+    def _page(self) -> int:
+        return max(1, self._slots)
+
+    # create or destroy the tree view rows to match the visible area
+    def _resize(self):
+        wanted = self._fitting_rows()
+        if wanted == self._slots and self._slots > 0:
+            return
+        while self._slots < wanted:
+            self._tv.insert("", tk.END, iid="r%s" % self._slots)
+            self._slots += 1
+        while self._slots > wanted:
+            self._slots -= 1
+            self._tv.delete("r%s" % self._slots)
+        self.refresh()
+        # the actual row height is known after the first row is displayed
+        if wanted == 1:
+            self.after_idle(self._resize)
+
+    def _yview(self, *args):
+        total = self._count()
+        if args[0] == tk.MOVETO:
+            self._set_offset(int(float(args[1]) * total))
+        elif args[0] == tk.SCROLL:
+            if args[2] == tk.PAGES:
+                self._scroll(int(args[1]) * self._page())
+            else:
+                self._scroll(int(args[1]))
+
+    def _wheel(self, event):
+        self._scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _scroll(self, rows: int):
+        self._set_offset(self._offset + rows)
+        return "break"
+
+    def _set_offset(self, offset: int):
+        offset = max(0, min(offset, self._count() - self._slots))
+        if offset != self._offset:
+            self._offset = offset
+            self.refresh()
+
+    # keyboard navigation moves the selection, scrolling when necessary
+    def _move_selection(self, rows: int):
+        total = self._count()
+        if total == 0:
+            return "break"
+        if self._selected is None:
+            index = self._offset
+        else:
+            index = max(0, min(self._selected + rows, total - 1))
+        if index < self._offset:
+            self._offset = index
+        elif index >= self._offset + self._slots:
+            self._offset = index - self._slots + 1
+        self._selected = index
+        self.refresh()
+        self._notify_selection()
+        return "break"
+
+    # the selection is stored as an index in the data source, so that it
+    # follows the row when the list is scrolled
+    def _store_selection(self):
+        selection = self._tv.selection()
+        if selection:
+            index = self._offset + int(selection[0][1:])
+            if index >= self._offset + len(self._rows):
+                # an empty row has been clicked: restore the selection
+                self.refresh()
+            elif index != self._selected:
+                self._selected = index
+                self._notify_selection()
+
+    def _notify_selection(self):
+        if self._on_select is not None:
+            self._on_select(self.selected_row())
+
+    # set a function that receives the selected row whenever it changes
+    def on_select(self, reaction: Callable[[Any], None] | None):
+        self._on_select = reaction
+
+    # the selected row as provided by the data source, or None
+    def selected_row(self) -> Any:
+        if self._selected is None:
+            return None
+        if self._offset <= self._selected < self._offset + len(self._rows):
+            return self._rows[self._selected - self._offset]
+        rows = self._fetch(self._selected, 1)
+        return rows[0] if rows else None
+
+    def clear_selection(self):
+        self._selected = None
+        self._notify_selection()
+
+    # notify that `count` rows have been added at the top of the data: the
+    # displayed rows stay in place unless the list is scrolled to the top
+    def prepended(self, count: int):
+        if self._selected is not None:
+            self._selected += count
+        if self._offset > 0:
+            self._offset += count
+        self.refresh()
+
+    # scroll to the top and clear the selection, when the data is replaced
+    def reset(self):
+        self._offset = 0
+        self._selected = None
+        self.refresh()
+        self._notify_selection()
+
+    # retrieve the visible rows from the data source and display them
+    def refresh(self):
+        total = self._count()
+        self._offset = max(0, min(self._offset, total - self._slots))
+        if self._selected is not None and self._selected >= total:
+            self._selected = None
+        self._rows = self._fetch(self._offset, self._slots) if self._slots else []
+        selected = ()
+        for n in range(self._slots):
+            iid = "r%s" % n
+            if n < len(self._rows):
+                image, values = self._render(self._rows[n])
+                self._tv.item(iid, image=image or "", values=values)
+                if self._offset + n == self._selected:
+                    selected = (iid,)
+            else:
+                self._tv.item(iid, image="", values=())
+        if selected:
+            self._tv.focus(selected[0])
+        self._tv.selection_set(selected)
+        if total > 0:
+            first = self._offset / total
+            last = min(1.0, (self._offset + self._slots) / total)
+            self._sb.set(first, last)
+        else:
+            self._sb.set(0.0, 1.0)
+
+
 # base dialog box class: provide a button strip at the bottom and a contents
 # area that can be used to display the needed widgets; also provides utilities
 # to bind widgets to retrievable values
@@ -513,6 +751,11 @@ class ApplicationForm(object):
         self._force_set_data(name, None)
         treeview.bind("<<TreeviewSelect>>", _store_data)
 
+    # bind a virtual list to a variable, that holds the selected data row
+    def _bind_virtual_treeview(self, name: str, vtreeview: VirtualTreeview):
+        self._force_set_data(name, None)
+        vtreeview.on_select(lambda row: self._force_set_data(name, row))
+
     # bind an event to this form
     def event_bind(self, event, reaction):
         self._dialog.bind(event, reaction)
@@ -564,6 +807,10 @@ class ApplicationForm(object):
             if dtype is not None:
                 raise ValueError("cannot specify type for Treeview")
             self._bind_ttk_treeview(name, widget)
+        elif isinstance(widget, VirtualTreeview):
+            if dtype is not None:
+                raise ValueError("cannot specify type for VirtualTreeview")
+            self._bind_virtual_treeview(name, widget)
         # one-type widgets
         elif isinstance(widget, (tk.Checkbutton, ttk.Checkbutton)):
             if dtype is not None and dtype != "bool":
@@ -780,6 +1027,8 @@ class ApplicationForm(object):
 __all__ = [
     "ApplicationForm",
     "MessageBox",
+    "VirtualTreeview",
+    "mat_icon",
     "BBOX_OK",
     "BBOX_CANCEL",
     "BBOX_ADD",
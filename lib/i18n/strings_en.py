@@ -382,11 +382,23 @@ CLI_ARG_HELP_DESKTOP = "Install program icons on the desktop too"
 CLI_ARG_HELP_AUTOSTART = f"Setup `{UI_APP}` to start when the user logs in"
 CLI_ARG_HELP_FIXCONFIG = f"Find and fix the `{CLI_WHENEVER}` configuration file across incompatible versions"
 CLI_ARG_HELP_CHECKCONFIG = f"Check the `{CLI_WHENEVER}` configuration file for errors"
+CLI_ARG_HELP_REBUILD_EXTRAS = "Rebuild the list of extra items and of their availability"
+CLI_ARG_HELP_CTL_COMMAND = "Command to send"
+CLI_ARG_HELP_CTL_NAMES = "Names of the items the command applies to (`-` to read them from standard input)"
+CLI_ARG_HELP_CTL_LIMIT = "Maximum number of history entries to retrieve"
+CLI_ARG_HELP_CTL_WAIT = "Wait until the scheduler acknowledges each command"
+CLI_ARG_HELP_CTL_TIMEOUT = "Seconds to wait for each acknowledgement"
+CLI_ARG_HELP_DIAG_TOPIC = "What to diagnose"
+CLI_ARG_HELP_DIAG_JSON = "Also write the results to a JSON file"
+CLI_ARG_HELP_DIAG_TOP = "Number of slowest imports to report"
 
 CLI_ARG_HELP_CMD_START = f"Start the `{CLI_WHENEVER}` scheduler and display the tray icon"
+CLI_ARG_HELP_CMD_DAEMON = f"Start the `{CLI_WHENEVER}` scheduler in the background, without any GUI"
 CLI_ARG_HELP_CMD_CONFIG = f"Start the `{UI_APP}` configuration utility"
 CLI_ARG_HELP_CMD_TOOLBOX = f"Run one of the various available utilities for `{UI_APP}`"
 CLI_ARG_HELP_CMD_VERSION = f"Display `{UI_APP}` version and exit"
+CLI_ARG_HELP_CMD_CTL = f"Send commands to a running instance of `{UI_APP}`"
+CLI_ARG_HELP_CMD_DIAG = f"Run diagnostics on `{UI_APP}` and report the results"
 
 CLI_ARG_HELP_INSTALL_WHENEVER = f"Install the latest release of `{CLI_WHENEVER}`"
 CLI_ARG_HELP_INSTALL_LUA = f"Install a Lua library for use in scripts used by `{CLI_WHENEVER}`"
@@ -424,6 +436,14 @@ CLI_ERR_ERROR_GENERIC = "An error occurred."
 
 CLI_ERR_CANNOT_CREATE_ICON = "Could not create program icon"
 CLI_ERR_CANNOT_CREATE_SHORTCUT = "Could not create shortcut or desktop file"
+CLI_ERR_SCHEDULER_EXITED = f"The [bold]`{CLI_WHENEVER}`[/] scheduler exited unexpectedly"
+CLI_ERR_EXTRA_NOT_LOADED = "Extra module [bold]`%s`[/] could not be loaded: %s"
+CLI_ERR_CTL_NOT_RUNNING = f"No running instance of `{UI_APP}` could be contacted"
+CLI_ERR_CTL_NAMES_REQUIRED = "Command [bold]`%s`[/] requires at least one name"
+CLI_ERR_CTL_COMMAND_FAILED = "Command [bold]`%s`[/] failed: %s"
+CLI_ERR_CTL_REFUSED = "not accepted by the scheduler"
+CLI_ERR_DIAG_FAILED = "Diagnostics could not be performed: %s"
+CLI_ERR_DIAG_CANNOT_WRITE = "Could not write results to [bold]`%s`[/]: %s"
 CLI_ERR_CANNOT_INSTALL_ON_RUNNING = f"An instance of [bold]`{CLI_WHENEVER}`[/] is running: shut it down before installation"
 
 CLI_ERR_DIR_EXISTS = "Directory [bold]`%s`[/] already exists"
@@ -460,6 +480,12 @@ CLI_MSG_OPERATION_FINISHED = "Operation finished."
 CLI_MSG_OPERATION_FAILED = "Operation failed."
 CLI_MSG_NO_ERRORS_FOUND = "No errors have been found."
 
+CLI_MSG_DIAG_PHASES = "Startup phases (duration, time spent importing, phase):"
+CLI_MSG_DIAG_IMPORTS = "Slowest %s imports (cumulative, self, module and phase):"
+CLI_MSG_DIAG_TOTAL = "Total time: %.1f ms"
+CLI_MSG_DIAG_SKIPPED = "skipped"
+CLI_MSG_DIAG_NO_IMPORTTIME = "Import times are not available in this distribution"
+
 CLI_APPICON_NAME_CONFIG = f"Configure {UI_APP}"
 CLI_APPICON_DESC_CONFIG = f"Standalone configuration utility for {UI_APP}"
 CLI_APPICON_NAME_START = f"Start {UI_APP}"
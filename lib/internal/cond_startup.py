@@ -4,14 +4,6 @@ from lib.i18n.strings import *
 
 from tomlkit import items, table
 
-import tkinter as tk
-import ttkbootstrap as ttk
-
-from ..forms.ui import *
-
-# since a condition is defined, the base form is the one for conditions
-from ..forms.cond import form_Condition
-
 from ..items.cond_interval import IntervalCondition
 from ..items.itemhelp import CheckedTable, ConfigurationError
 
@@ -74,32 +66,4 @@ class StartupCondition(IntervalCondition):
         return IntervalCondition.as_table(self)
 
 
-# specialized subform: it will never be shown because the item is not available
-class form_StartupCondition(form_Condition):
-
-    def __init__(self, tasks_available, item=None):
-        if item:
-            assert isinstance(item, StartupCondition)
-        else:
-            item = StartupCondition()
-        super().__init__(UI_TITLE_EVENTCOND, tasks_available, item)
-        assert isinstance(self._item, StartupCondition)
-
-        # build the UI: build widgets, arrange them in the box, bind data
-
-        # client area
-        area = ttk.Frame(super().contents)
-        area.grid(row=0, column=0, sticky=tk.NSEW)
-        PAD = WIDGET_PADDING_PIXELS
-
-        # widgets section
-        l_noParams = ttk.Label(area, text=UI_CAPTION_NOSPECIFICPARAMS)
-
-        # arrange items in the grid
-        l_noParams.grid(row=0, column=0, sticky=tk.W, padx=PAD, pady=PAD)
-
-        # update the form
-        self._updateform()
-
-
 # end.
@@ -40,20 +40,10 @@ from ..i18n.strings import *
 
 from tomlkit import items, table
 
-import tkinter as tk
-import ttkbootstrap as ttk
-import ttkbootstrap.constants as ttkc
-
-from ..forms.ui import *
-
-# since a condition is defined, the base form is the one for conditions
-from ..forms.cond import form_Condition
-
 from ..utility import (
     get_lua_initscript,
     get_lua_path,
     get_private_item_name_prefix,
-    clean_caption,
 )
 
 from ..items import cond, task_lua, cond_lua, cond_interval
@@ -139,7 +129,8 @@ def initial_condition_name() -> str:
 # can implement this type of condition as an "extra" condition anyway, so
 # we define an item and a form for it exactly in the same way: the only
 # difference is that the item is forced into the available ones and not
-# dynamically loaded from the `extra` module folder
+# dynamically loaded from the `extra` module folder; the form is defined
+# in `forms.cond_mcrt`, so that the item can be used without the GUI
 class ConfluenceCondition(cond_lua.LuaScriptCondition):
 
     # availability at class level: these variables *MUST* be set for all items
@@ -197,142 +188,6 @@ class ConfluenceCondition(cond_lua.LuaScriptCondition):
         return None
 
 
-class form_ConfluenceCondition(form_Condition):
-
-    # note that the available conditions should be filtered, the provided
-    # names must correspond to conditions that activate confluence: this
-    # module provides a helper to distinguish them from others
-    def __init__(self, tasks_available, item=None):
-        # check that item is the expected one for safety, build one by default
-        if item:
-            assert isinstance(item, ConfluenceCondition)
-        else:
-            item = ConfluenceCondition()
-
-        self._conds_available = list()
-        self._conds_activating = item.tags.get("mcrt_confluent_conditions") or list()
-        super().__init__(UI_TITLE_MCRTCOND, tasks_available, item)
-
-        # create a specific frame for the contents
-        area = ttk.Frame(super().contents)
-        area.grid(row=0, column=0, sticky=tk.NSEW)
-        PAD = WIDGET_PADDING_PIXELS
-
-        l_activatingConds = ttk.Label(area, text=UI_FORM_MCRT_ACTIVATINGCONDS_SC)
-        sftv_activatingConds = ttk.Frame(area)
-        tv_activatingConds = ttk.Treeview(
-            sftv_activatingConds,
-            columns=("seq", "conditions"),
-            show="",
-            displaycolumns=(1,),
-            height=5,
-            bootstyle=ttkc.SECONDARY,
-        )
-        sb_activatingConds = ttk.Scrollbar(
-            sftv_activatingConds, orient=tk.VERTICAL, command=tv_activatingConds.yview
-        )
-        tv_activatingConds.configure(yscrollcommand=sb_activatingConds.set)
-        tv_activatingConds.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        sb_activatingConds.pack(side=tk.RIGHT, fill=tk.Y)
-
-        sf_condChoose = ttk.Frame(area)
-        l_chooseCond = ttk.Label(sf_condChoose, text=UI_FORM_COND_SC)
-        cb_chooseCond = ttk.Combobox(
-            sf_condChoose, values=self._conds_available, state="readonly"
-        )
-        b_addCond = ttk.Button(
-            sf_condChoose,
-            text=UI_ADD,
-            width=BUTTON_STANDARD_WIDTH,
-            command=self.add_cond,
-        )
-        b_delCond = ttk.Button(
-            sf_condChoose,
-            text=UI_DEL,
-            width=BUTTON_STANDARD_WIDTH,
-            command=self.del_cond,
-        )
-
-        # choose condition section: arrange items
-        l_chooseCond.grid(row=0, column=0, sticky=tk.W, padx=PAD, pady=PAD)
-        cb_chooseCond.grid(row=0, column=1, sticky=tk.EW, padx=PAD, pady=PAD)
-        b_addCond.grid(row=0, column=2, sticky=tk.E, padx=PAD, pady=PAD)
-        b_delCond.grid(row=0, column=3, sticky=tk.E, padx=PAD, pady=PAD)
-
-        # notebook area: arrange items
-        l_activatingConds.grid(row=0, column=0, sticky=tk.EW, padx=PAD, pady=PAD)
-        sftv_activatingConds.grid(row=1, column=0, sticky=tk.NSEW, padx=PAD, pady=PAD)
-        sf_condChoose.grid(row=2, column=0, sticky=tk.EW, padx=PAD, pady=PAD)
-
-        # expand appropriate sections
-        sf_condChoose.columnconfigure(1, weight=1)
-        area.rowconfigure(1, weight=1)
-        area.columnconfigure(0, weight=1)
-
-        # bind data to widgets
-        self.data_bind(
-            "cond_selection",
-            tv_activatingConds,
-            check=lambda _: len(self._conds_activating) > 1,
-        )
-        self.data_bind("choose_cond", cb_chooseCond, TYPE_STRING)
-
-        # add a check that the chosen conditions should be more than one
-        self.add_check_caption(
-            "cond_selection", clean_caption(UI_FORM_MCRT_ACTIVATINGCONDS_SC)
-        )
-
-        # propagate widgets that need to be accessed
-        self._tv_activatingConds = tv_activatingConds
-        self._cb_chooseCond = cb_chooseCond
-
-        # always update the form at the end of initialization
-        self._updateform()
-
-    def add_cond(self):
-        # only add a condition if not present, ignore otherwise
-        elem = self.data_get("choose_cond")
-        if elem and elem not in self._conds_activating:
-            self._conds_activating.append(elem)
-        self._updatedata()
-        self._updateform()
-
-    def del_cond(self):
-        elem = self.data_get("cond_selection")
-        if elem:
-            idx = int(elem[0])
-            del self._conds_activating[idx]
-            self._updatedata()
-            self._updateform()
-
-    # update the form with the specific parameters (usually in the `tags`)
-    def _updateform(self):
-        self._tv_activatingConds.delete(*self._tv_activatingConds.get_children())
-        idx = 0
-        for cnd in self._conds_activating:
-            self._tv_activatingConds.insert(
-                "", iid="%s-%s" % (idx, cnd), values=(idx, cnd), index=tk.END
-            )
-            idx += 1
-        return super()._updateform()
-
-    # update the item from the form elements (usually update `tags`)
-    def _updatedata(self):
-        assert isinstance(self._item, ConfluenceCondition)
-        self._item.tags["mcrt_confluent_conditions"] = self._conds_activating  # type: ignore
-        return super()._updatedata()
-
-    # set the list of available conditions, that implement confluence
-    def set_available_conditions(self, conds: list[str]):
-        self._conds_available = conds.copy()
-        self._conds_available.sort()
-        self._cb_chooseCond["values"] = self._conds_available
-        for cnd in self._conds_activating.copy():
-            if cnd not in self._conds_available:
-                self._conds_activating.remove(cnd)
-        self._updateform()
-
-
 # check whether a condition is confluent
 def is_confluent_cond(c: cond.Condition) -> bool:
     if c.tasks is not None and len(c.tasks) == 1:
@@ -356,7 +211,6 @@ __all__ = [
     "is_confluent_cond",
     "is_confluence_cond",
     "ConfluenceCondition",
-    "form_ConfluenceCondition",
 ]
 
 
@@ -2,24 +2,7 @@
 
 from lib.i18n.strings import *
 
-from lib.forms.task_command import form_CommandTask
-from lib.forms.task_lua import form_LuaScriptTask
-from lib.forms.task_internal import form_InternalCommandTask
-
-from lib.forms.cond_command import form_CommandCondition
-from lib.forms.cond_dbus import form_DBusCondition
-from lib.forms.cond_event import form_EventCondition
-from lib.forms.cond_idle import form_IdleCondition
-from lib.forms.cond_interval import form_IntervalCondition
-from lib.forms.cond_lua import form_LuaScriptCondition
-from lib.forms.cond_time import form_TimeCondition
-from lib.forms.cond_wmi import form_WMICondition
-
-from lib.forms.event_cli import form_CommandEvent
-from lib.forms.event_dbus import form_DBusEvent
-from lib.forms.event_fschange import form_FilesystemChangeEvent
-from lib.forms.event_wmi import form_WMIEvent
-
+from importlib import import_module
 
 from lib.items.task_command import CommandTask
 from lib.items.task_lua import LuaScriptTask
@@ -40,25 +23,59 @@ from lib.items.event_fschange import FilesystemChangeEvent
 from lib.items.event_wmi import WMIEvent
 
 # this is a special case because it implies auxiliary item when used
-from ..internal.multi_conds_run_task import ConfluenceCondition, form_ConfluenceCondition
-from ..internal.cond_startup import StartupCondition, form_StartupCondition
-
-# to dynamically determine nature of extra items
-from lib.items.task import Task
-from lib.items.cond import Condition
-from lib.items.event import Event
-
+from ..internal.multi_conds_run_task import ConfluenceCondition
+from ..internal.cond_startup import StartupCondition
 
 # other items will share the same file for both the item and the form, and
 # all related string resources should be defined within the same file
 
 
+# a reference to a form class, given as module path and class name: the form
+# module is only imported when the form is used for the first time, so that
+# the editors (and the libraries they depend on) are only loaded by the
+# processes that actually open them; calling the reference creates a form
+# exactly as calling the class would do
+class FormReference(object):
+
+    def __init__(self, module: str, name: str):
+        self.module = module
+        self.name = name
+        self._form = None
+
+    # import the form module if needed and return the form class
+    def resolve(self):
+        if self._form is None:
+            self._form = getattr(import_module(self.module), self.name)
+        return self._form
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+
+# a reference to an item class, whose availability is known in advance: the
+# other class attributes are retrieved from the class, imported when needed
+class ItemReference(FormReference):
+
+    def __init__(self, module: str, name: str, available: bool):
+        super().__init__(module, name)
+        self.available = available
+
+    def __getattr__(self, name: str):
+        return getattr(self.resolve(), name)
+
+
+# shortcut for references to the forms in the `forms` package
+def _form(module: str, name: str) -> FormReference:
+    return FormReference("lib.forms.%s" % module, name)
+
+
 # a list of all available items to allow creating new ones: all tuples consist
 # of five fields:
 #
 # - type: one possible item type (see below)
 # - hr name: the human readable name (from i18n.strings)
-# - form: the corresponding form object that will be opened
+# - form: the corresponding form object that will be opened, possibly given
+#   as a reference that is resolved when the form is opened for the first time
 # - item: the corresponding item class that would be instantiated
 #
 # the `signature` string is formed as follows:
@@ -76,47 +93,43 @@ from lib.items.event import Event
 # form identifiers); the <spec> part is optional, omitted for items that are
 # native to **whenever**.
 ALL_AVAILABLE_ITEMS = [
-    # signature        hr name              form                        item
-    ('task:command',   ITEM_TASK_COMMAND,   form_CommandTask,           CommandTask),
-    ('task:lua',       ITEM_TASK_LUA,       form_LuaScriptTask,         LuaScriptTask),
-    ('task:internal',  ITEM_TASK_INTERNAL,  form_InternalCommandTask,   InternalCommandTask),
-
-    ('cond:command',   ITEM_COND_COMMAND,   form_CommandCondition,      CommandCondition),
-    ('cond:dbus',      ITEM_COND_DBUS,      form_DBusCondition,         DBusCondition),
-    ('cond:event',     ITEM_COND_EVENT,     form_EventCondition,        EventCondition),
-    ('cond:idle',      ITEM_COND_IDLE,      form_IdleCondition,         IdleCondition),
-    ('cond:interval',  ITEM_COND_INTERVAL,  form_IntervalCondition,     IntervalCondition),
-    ('cond:lua',       ITEM_COND_LUA,       form_LuaScriptCondition,    LuaScriptCondition),
-    ('cond:time',      ITEM_COND_TIME,      form_TimeCondition,         TimeCondition),
-    ('cond:wmi',       ITEM_COND_WMI,       form_WMICondition,          WMICondition),
-
-    ('event:cli',      ITEM_EVENT_CLI,      form_CommandEvent,          CommandEvent),
-    ('event:dbus',     ITEM_EVENT_DBUS,     form_DBusEvent,             DBusEvent),
-    ('event:fschange', ITEM_EVENT_FSCHANGE, form_FilesystemChangeEvent, FilesystemChangeEvent),
-    ('event:wmi',      ITEM_EVENT_WMI,      form_WMIEvent,              WMIEvent),
+    # signature        hr name              form                                                      item
+    ('task:command',   ITEM_TASK_COMMAND,   _form("task_command", "form_CommandTask"),                CommandTask),
+    ('task:lua',       ITEM_TASK_LUA,       _form("task_lua", "form_LuaScriptTask"),                  LuaScriptTask),
+    ('task:internal',  ITEM_TASK_INTERNAL,  _form("task_internal", "form_InternalCommandTask"),       InternalCommandTask),
+
+    ('cond:command',   ITEM_COND_COMMAND,   _form("cond_command", "form_CommandCondition"),           CommandCondition),
+    ('cond:dbus',      ITEM_COND_DBUS,      _form("cond_dbus", "form_DBusCondition"),                 DBusCondition),
+    ('cond:event',     ITEM_COND_EVENT,     _form("cond_event", "form_EventCondition"),               EventCondition),
+    ('cond:idle',      ITEM_COND_IDLE,      _form("cond_idle", "form_IdleCondition"),                 IdleCondition),
+    ('cond:interval',  ITEM_COND_INTERVAL,  _form("cond_interval", "form_IntervalCondition"),         IntervalCondition),
+    ('cond:lua',       ITEM_COND_LUA,       _form("cond_lua", "form_LuaScriptCondition"),             LuaScriptCondition),
+    ('cond:time',      ITEM_COND_TIME,      _form("cond_time", "form_TimeCondition"),                 TimeCondition),
+    ('cond:wmi',       ITEM_COND_WMI,       _form("cond_wmi", "form_WMICondition"),                   WMICondition),
+
+    ('event:cli',      ITEM_EVENT_CLI,      _form("event_cli", "form_CommandEvent"),                  CommandEvent),
+    ('event:dbus',     ITEM_EVENT_DBUS,     _form("event_dbus", "form_DBusEvent"),                    DBusEvent),
+    ('event:fschange', ITEM_EVENT_FSCHANGE, _form("event_fschange", "form_FilesystemChangeEvent"),    FilesystemChangeEvent),
+    ('event:wmi',      ITEM_EVENT_WMI,      _form("event_wmi", "form_WMIEvent"),                      WMIEvent),
 
     # the following item are native to When (and not to whenever), thus not extras
-    ('cond:lua:mcrt_confluence', ITEM_COND_MCRT, form_ConfluenceCondition, ConfluenceCondition),
-    ('cond:interval:startup', ITEM_COND_STARTUP, form_StartupCondition, StartupCondition),
+    ('cond:lua:mcrt_confluence', ITEM_COND_MCRT, _form("cond_mcrt", "form_ConfluenceCondition"), ConfluenceCondition),
+    ('cond:interval:startup', ITEM_COND_STARTUP, _form("cond_startup", "form_StartupCondition"), StartupCondition),
 ]
 
 
-# dynamically load modules from the `extra` package
+# add the items from the `extra` package, as described by its manifest, so
+# that the extra modules are only imported when their items are used
 from lib import extra
 
-for m in extra.factories:
-    item_class, item_form = extra.factories[m]
-    if issubclass(item_class, Task):
-        prefix = 'task'
-    elif issubclass(item_class, Condition):
-        prefix = 'cond'
-    elif issubclass(item_class, Event):
-        prefix = 'event'
-    else:
-        prefix = None
-    if prefix:
-        signature = '%s:%s:%s' % (prefix, item_class.item_type, item_class.item_subtype)        # type: ignore
-        ALL_AVAILABLE_ITEMS.append((signature, item_class.item_hrtype, item_form, item_class))  # type: ignore
+for entry in extra.manifest_items():
+    module = "lib.extra.%s" % entry["module"]
+    ALL_AVAILABLE_ITEMS.append((
+        entry["signature"],
+        entry["hrtype"],
+        FormReference(module, entry["form"]),
+        ItemReference(module, entry["item"], entry["available"]),
+    ))
 
 
 # a dictionary version of the above list
@@ -77,6 +77,49 @@ def is_dir(path):
         return False
 
 
+# resident memory of the current process in bytes, if it can be determined:
+# where the current value is not available, the peak value is returned
+def get_resident_memory() -> int | None:
+    try:
+        if sys.platform == "linux":
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        elif sys.platform.startswith("win"):
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()  # type: ignore
+            if ctypes.windll.psapi.GetProcessMemoryInfo(  # type: ignore
+                process, ctypes.byref(counters), counters.cb
+            ):
+                return counters.WorkingSetSize
+            return None
+        else:
+            import resource
+
+            # the peak value is expressed in bytes on macOS, in KiB elsewhere
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return None
+
+
 __all__ = [
     "is_linux",
     "is_windows",
@@ -84,6 +127,7 @@ __all__ = [
     "is_command",
     "is_dir",
     "has_command",
+    "get_resident_memory",
 ]
 
 # end.
@@ -67,12 +67,61 @@ AppConfig = _AppConfiguration(
         # the application base name for configuration directory determination
         "CFGNAME": "Whenever",
 
-        # milliseconds between log reads by the secondary thread
+        # milliseconds to let the scheduler settle on startup and shutdown
         "MSECS_BETWEEN_READS": 100.0,
 
+        # maximum size in bytes of a single read from the scheduler output
+        "LOG_READ_CHUNK_SIZE": 65536,
+
+        # maximum delay (milliseconds) and number of records between flushes
+        # of the log file, which is written by a background thread
+        "LOG_FLUSH_INTERVAL": 500.0,
+        "LOG_FLUSH_BATCH": 256,
+
+        # log rotation: size in bytes that triggers it (0 to disable), daily
+        # rotation, number of rotated logs to keep, and their compression
+        "LOG_ROTATE_MAX_BYTES": 16 * 1024 * 1024,
+        "LOG_ROTATE_DAILY": False,
+        "LOG_ROTATE_KEEP": 5,
+        "LOG_ROTATE_COMPRESS": True,
+
+        # JSON decoder for log records: "auto", "orjson", "ujson", or "json"
+        "JSON_DECODER": "auto",
+
+        # number of threads used to run independent startup steps
+        "STARTUP_WORKERS": 4,
+
+        # whether or not a running instance accepts commands on a local socket
+        "CONTROL_SOCKET": True,
+
+        # seconds to wait for the scheduler to acknowledge a command
+        "COMMAND_ACK_TIMEOUT": 10.0,
+
+        # milliseconds between two deliveries of the events that are sent to
+        # the main loop by other threads
+        "EVENT_PUMP_MS": 50,
+
+        # minimum time (in milliseconds) the busy tray icon stays displayed,
+        # and time the scheduler must be busy before it is displayed
+        "TRAY_ICON_MIN_DWELL_MS": 1000,
+        "TRAY_ICON_BUSY_DELAY_MS": 300,
+
+        # amount of scheduler stderr output (in bytes) that is retained
+        "STDERR_BUFFER_SIZE": 65536,
+
         # history queue length
         "HISTORY_LENGTH": 100,
 
+        # whether or not to save task history to a database in APPDATA, and
+        # the maximum number of records written in a single transaction
+        "HISTORY_DB": True,
+        "HISTORY_DB_BATCH": 500,
+
+        # maximum number of task executions tracked as running, and seconds
+        # after which an execution whose end is not received is abandoned
+        "HISTORY_OPEN_MAX": 1024,
+        "HISTORY_OPEN_TTL": 86400.0,
+
         # whether or not to reset conditions on workstation resume
         "RESET_CONDS_ON_RESUME": True,
 
@@ -0,0 +1,212 @@
+# command acknowledgements: correlation of the commands sent to the scheduler
+# with the log records that report their outcome
+#
+# the scheduler does not reply to the commands it reads on stdin, but it logs
+# what it does with them: each command that is sent and whose outcome is
+# awaited is registered here along with a future, and every record emitted
+# by the scheduler is matched against the commands still waiting for an
+# acknowledgement. A record matches when its action is the name of the
+# command and its item is the one the command applies to (or none for the
+# commands that apply to no item); the oldest matching command is resolved,
+# since the scheduler handles commands in the order in which they are
+# received. The future then holds the message of the record
+# if it reports success (status OK, or the new state for pause and resume),
+# or a `CommandError` if it reports a failure (status ERR or FAIL). Commands
+# that are not acknowledged in time fail with a `TimeoutError`, and all the
+# pending ones fail when the scheduler exits.
+
+import heapq
+import threading
+
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from time import monotonic
+
+from ..repocfg import AppConfig
+
+
+# seconds to wait for the acknowledgement of a command
+_COMMAND_ACK_TIMEOUT: float = AppConfig.get("COMMAND_ACK_TIMEOUT", 10.0)  # type: ignore
+
+
+# commands that are acknowledged by a change of the scheduler state, and the
+# status of the state record (of type PAUSE) that reports the change
+_ACK_STATES = {
+    "pause": "YES",
+    "resume": "NO",
+}
+
+# the statuses that report success or failure: other ones (such as MSG)
+# report progress, and do not acknowledge anything
+_STATUS_SUCCESS = ("OK",)
+_STATUS_FAILURE = ("ERR", "FAIL")
+
+
+# raised (through the future) when the scheduler refuses a command
+class CommandError(Exception):
+    pass
+
+
+# set the outcome of a future unless already done
+def _resolve(future: Future, result=None, error: Exception | None = None):
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+# a command waiting for its acknowledgement
+class _Pending(object):
+
+    def __init__(self, command: str, item: str | None, deadline: float):
+        self.command = command
+        self.item = item
+        self.deadline = deadline
+        self.future = Future()
+
+    # resolve the future unless already done, possibly by another thread
+    def resolve(self, result=None, error: Exception | None = None):
+        _resolve(self.future, result, error)
+
+
+class CommandTracker(object):
+
+    def __init__(self, timeout: float = _COMMAND_ACK_TIMEOUT):
+        self._timeout = timeout
+        self._by_action = {}
+        self._deadlines = []
+        self._count = 0
+        self._seq = 0
+        self._mutex = threading.Lock()
+        self._wake = threading.Condition(self._mutex)
+        self._sweeper = None
+
+    # number of commands still waiting: used to decide whether records that
+    # would otherwise be discarded must be decoded
+    def pending(self) -> int:
+        return self._count
+
+    # register a command before it is sent, and return its future
+    def register(
+        self,
+        command: str,
+        item: str | None = None,
+        timeout: float | None = None,
+    ) -> Future:
+        if timeout is None:
+            timeout = self._timeout
+        entry = _Pending(command, item, monotonic() + timeout)
+        with self._mutex:
+            queue = self._by_action.setdefault(command, deque())
+            while queue and queue[0].future.done():
+                queue.popleft()
+            queue.append(entry)
+            self._seq += 1
+            heapq.heappush(self._deadlines, (entry.deadline, self._seq, entry))
+            self._count += 1
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(
+                    target=self._sweep, name="command sweeper", daemon=True
+                )
+                self._sweeper.start()
+            self._wake.notify()
+        entry.future.add_done_callback(self._done)
+        return entry.future
+
+    def _done(self, _):
+        with self._mutex:
+            self._count -= 1
+
+    # find the oldest command acknowledged by a record with the given action
+    # and item, dropping the commands already resolved from the queue
+    def _take(self, action: str, item: str | None) -> _Pending | None:
+        queue = self._by_action.get(action)
+        if not queue:
+            return None
+        while queue and queue[0].future.done():
+            queue.popleft()
+        for entry in queue:
+            if entry.future.done():
+                continue
+            # a command for an item is only acknowledged by a record about
+            # the same item, and a command for no item by a record for none
+            if entry.item == item:
+                return entry
+        return None
+
+    # match a decoded record against the pending commands: called by the
+    # thread that reads the scheduler output, for every record
+    def acknowledge(self, record: dict):
+        if not self._count:
+            return
+        try:
+            context = record["contents"]["context"]
+            message_type = record["contents"]["message_type"]
+            when = message_type["when"]
+            status = message_type["status"]
+            message = record["contents"].get("message")
+        except (KeyError, TypeError):
+            return
+        if context.get("emitter") == "FRONTEND":
+            return
+        entry = None
+        error = None
+        with self._mutex:
+            if when == "PAUSE":
+                for command, state in _ACK_STATES.items():
+                    if status == state:
+                        entry = self._take(command, None)
+            elif status in _STATUS_SUCCESS or status in _STATUS_FAILURE:
+                entry = self._take(context.get("action"), context.get("item"))
+                if status in _STATUS_FAILURE:
+                    error = CommandError(message or status)
+        if entry is not None:
+            entry.resolve(message, error)
+
+    # fail all pending commands, for instance because the scheduler exited
+    def abandon(self, reason: str):
+        with self._mutex:
+            entries = list(x for _, _, x in self._deadlines)
+            self._deadlines.clear()
+            self._by_action.clear()
+        for entry in entries:
+            entry.resolve(error=CommandError(reason))
+
+    # fail the given commands, for instance because they could not be sent
+    def fail(self, futures: list[Future], reason: str):
+        for future in futures:
+            _resolve(future, error=CommandError(reason))
+
+    # fail the commands whose deadline has passed: the thread only wakes up
+    # at the earliest deadline, or when a command is registered
+    def _sweep(self):
+        while True:
+            expired = []
+            with self._mutex:
+                while not expired:
+                    now = monotonic()
+                    while self._deadlines and (
+                        self._deadlines[0][0] <= now
+                        or self._deadlines[0][2].future.done()
+                    ):
+                        expired.append(heapq.heappop(self._deadlines)[2])
+                    if not expired:
+                        if self._deadlines:
+                            self._wake.wait(self._deadlines[0][0] - now)
+                        else:
+                            self._wake.wait()
+            for entry in expired:
+                entry.resolve(
+                    error=TimeoutError(
+                        "command `%s` not acknowledged in time" % entry.command
+                    )
+                )
+
+
+__all__ = ["CommandTracker", "CommandError"]
+
+
+# end.
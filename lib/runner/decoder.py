@@ -0,0 +1,75 @@
+# JSON decoder for log records
+#
+# the scheduler emits one JSON record per line, and decoding them is the main
+# cost of log ingestion: a faster decoder is used when one of the supported
+# optional packages is installed, otherwise the standard library is used; all
+# backends accept both `str` and `bytes` lines, so that the raw output of the
+# scheduler can be decoded without converting it to text first
+
+import json
+
+from ..repocfg import AppConfig
+
+
+# the supported backends, in order of preference
+_BACKENDS = ("orjson", "ujson", "json")
+
+
+# build a decoding function for the named backend, or return None if the
+# corresponding module is not available
+def _load_backend(name: str):
+    if name == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            return None
+        return orjson.loads
+    elif name == "ujson":
+        try:
+            import ujson
+        except ImportError:
+            return None
+        return ujson.loads
+    elif name == "json":
+        return json.loads
+    else:
+        return None
+
+
+# choose the backend: a specific one can be forced through the configuration,
+# falling back to the automatic choice if it is not available
+def _choose_backend():
+    preferred: str = AppConfig.get("JSON_DECODER", "auto")  # type: ignore
+    if preferred in _BACKENDS:
+        decode = _load_backend(preferred)
+        if decode is not None:
+            return preferred, decode
+    for name in _BACKENDS:
+        decode = _load_backend(name)
+        if decode is not None:
+            return name, decode
+    # never reached, as the standard library is always available
+    return "json", json.loads
+
+
+_decoder_name, _decode = _choose_backend()
+
+
+# errors raised by all backends when the input is invalid derive from this
+DecodeError = ValueError
+
+
+# decode a single record
+def decode_record(line: str | bytes) -> dict:
+    return _decode(line)
+
+
+# the name of the backend in use
+def decoder_name() -> str:
+    return _decoder_name
+
+
+__all__ = ["decode_record", "decoder_name", "DecodeError"]
+
+
+# end.
@@ -1,19 +1,82 @@
 # history manager
 #
-# builds a limited log that only holds history records and task duration
+# builds a limited log that only holds history records and task duration:
+# records are kept in a fixed capacity ring, so that appending a record when
+# the history is full just drops the oldest one, and each record is numbered
+# with a monotonically increasing sequence number, so that readers can only
+# retrieve the records that have been added since their last read; when a
+# persistent store is provided, records are also saved there, and the most
+# recent ones are loaded back on startup
+#
+# task executions that have started but not finished yet are tracked in a
+# bounded structure: since a task may be running more than once at the same
+# time, the executions of each task are kept in order of start, and an end
+# record is matched with the oldest one; executions whose end is never
+# received (for instance because the scheduler was killed) are eventually
+# evicted and recorded as abandoned, while end records without a start are
+# recorded without duration
+
 
+import sqlite3
 
+from collections import deque, OrderedDict
+from itertools import islice
+from threading import Lock
 from datetime import datetime
+from time import monotonic
 from ..utility import get_private_item_name_prefix
 
+from .stats import TaskStats, OUTCOME_ABANDONED
+
+from ..repocfg import AppConfig
+
+
+# maximum number of executions that can be tracked as running at once
+_HISTORY_OPEN_MAX: int = AppConfig.get("HISTORY_OPEN_MAX", 1024)  # type: ignore
+
+# seconds after which an execution without an end is considered abandoned
+_HISTORY_OPEN_TTL: float = AppConfig.get("HISTORY_OPEN_TTL", 86400.0)  # type: ignore
+
+# message for abandoned executions
+_MSG_ABANDONED = "abandoned: the end of the execution has not been received"
+
+
+# parse the message of a history record, which has the following form:
+#
+#   <outcome>/<origin>:<trigger> <message>
+#
+# returning a tuple of outcome, trigger, and message: if the message cannot
+# be parsed the outcome is undetermined and the message is kept as a whole
+def _parse_message(message: str) -> tuple[str, str, str]:
+    try:
+        ident, msg = message.split(" ", 1)
+        outcome, t = ident.split("/")
+        _, trigger = t.split(":")
+        return outcome, trigger, msg
+    except ValueError:
+        return "IND", "", message
+
 
 class History(object):
 
-    def __init__(self, maxlen):
-        self._history = []
+    def __init__(self, maxlen, store=None):
+        self._history = deque(maxlen=maxlen)
         self._maxlen = maxlen
-        self._open_records_timing = {}
+        self._seq = 0
+        self._mutex = Lock()
+        self._open_records_timing = OrderedDict()
+        self._open_runs = {}
+        self._run_seq = 0
+        self._unmatched_ends = 0
+        self._abandoned = 0
         self._private_prefix = get_private_item_name_prefix()
+        self._stats = {}
+        self._store = store
+        if self._store is not None:
+            for entry in self._store.recent(maxlen):
+                self._seq += 1
+                self._history.append(entry)
+                self._update_stats(entry)
 
     def append(self, record):
         time = record["header"]["time"]
@@ -28,19 +91,36 @@ class History(object):
         message = record["contents"]["message"]
         itemstr = "%s/%s" % (item, item_id)
         if when == "HIST" and not item.startswith(self._private_prefix):
+            self._expire_open_records()
             if status == "START":
-                self._open_records_timing[itemstr] = time
+                # executions are identified by a sequence number, since the
+                # same task may start again before the previous run ends
+                self._run_seq += 1
+                run = (itemstr, self._run_seq)
+                self._open_records_timing[run] = (
+                    time,
+                    item,
+                    item_id,
+                    message,
+                    monotonic(),
+                )
+                self._open_runs.setdefault(itemstr, deque()).append(run)
+                while len(self._open_records_timing) > _HISTORY_OPEN_MAX:
+                    self._abandon(next(iter(self._open_records_timing)))
             else:
-                end = datetime.fromisoformat(time)
-                start = datetime.fromisoformat(self._open_records_timing[itemstr])
-                del self._open_records_timing[itemstr]
-                duration = end - start
-                if len(self._history) == self._maxlen:
-                    self._history = self._history[1:]
-                ident, msg = message.split(" ", 1)
-                outcome, t = ident.split("/")
-                _, trigger = t.split(":")
-                self._history.append(
+                outcome, trigger, msg = _parse_message(message)
+                opened = self._close_run(itemstr)
+                if opened is None:
+                    self._unmatched_ends += 1
+                    duration = None
+                else:
+                    try:
+                        end = datetime.fromisoformat(time)
+                        start = datetime.fromisoformat(opened[0])
+                        duration = end - start
+                    except ValueError:
+                        duration = None
+                self._add_entry(
                     {
                         "time": time,
                         "task": item,
@@ -55,11 +135,173 @@ class History(object):
             # ignore the message
             pass
 
+    # update the running aggregates of the task an entry refers to
+    def _update_stats(self, entry):
+        task = entry["task"]
+        stats = self._stats.get(task)
+        if stats is None:
+            stats = self._stats[task] = TaskStats(task)
+        stats.add(entry)
+
+    # add an entry to the history and to the persistent store
+    def _add_entry(self, entry):
+        with self._mutex:
+            self._seq += 1
+            self._history.append(entry)
+            self._update_stats(entry)
+        store = self._store
+        if store is not None:
+            store.add(entry)
+
+    # stop tracking the oldest running execution of a task, and return the
+    # data of its start, or None if the task is not running
+    def _close_run(self, itemstr: str):
+        runs = self._open_runs.get(itemstr)
+        if not runs:
+            return None
+        run = runs.popleft()
+        if not runs:
+            del self._open_runs[itemstr]
+        return self._open_records_timing.pop(run)
+
+    # stop tracking a running execution, and record it as abandoned: as
+    # executions are evicted in order of start, it is the oldest of its task
+    def _abandon(self, run: tuple[str, int]):
+        start_time, item, item_id, message, _ = self._close_run(run[0])
+        _, trigger, _ = _parse_message(message)
+        now = datetime.now()
+        try:
+            duration = now - datetime.fromisoformat(start_time)
+        except ValueError:
+            duration = None
+        self._abandoned += 1
+        self._add_entry(
+            {
+                "time": now.strftime("%Y-%m-%dT%H:%M:%S.%f"),
+                "task": item,
+                "task_id": item_id,
+                "trigger": trigger,
+                "duration": duration,
+                "success": OUTCOME_ABANDONED,
+                "message": _MSG_ABANDONED,
+            }
+        )
+
+    # abandon executions that have been running for too long: as they are
+    # kept in order of start, only the oldest ones have to be checked
+    def _expire_open_records(self):
+        limit = monotonic() - _HISTORY_OPEN_TTL
+        while self._open_records_timing:
+            run = next(iter(self._open_records_timing))
+            if self._open_records_timing[run][4] > limit:
+                break
+            self._abandon(run)
+
+    # abandon all running executions, for instance when the scheduler exits
+    def abandon_all(self):
+        while self._open_records_timing:
+            self._abandon(next(iter(self._open_records_timing)))
+
+    # number of executions currently tracked as running
+    def open_count(self) -> int:
+        return len(self._open_records_timing)
+
+    # counters for end records without a start and abandoned executions
+    def orphan_counters(self) -> dict:
+        return {
+            "unmatched_end": self._unmatched_ends,
+            "abandoned": self._abandoned,
+        }
+
+    # the persistent store, if any
+    def store(self):
+        return self._store
+
+    # write pending records to the persistent store and close it: from then
+    # on only the records in memory are available
+    def close(self):
+        with self._mutex:
+            store, self._store = self._store, None
+        if store is not None:
+            store.close()
+
+    # sequence number of the most recent record (0 if there is none)
+    def last_seq(self) -> int:
+        return self._seq
+
     def get(self):
-        return self._history
+        with self._mutex:
+            return list(self._history)
 
     def get_copy(self):
-        return self._history.copy()
+        return self.get()
+
+    # return the sequence number of the most recent record along with the
+    # records added after the one numbered `seq`, oldest first: if some of
+    # these have already been dropped, only the retained ones are returned
+    def get_since(self, seq: int) -> tuple[int, list]:
+        with self._mutex:
+            count = min(max(0, self._seq - seq), len(self._history))
+            entries = list(islice(reversed(self._history), count))
+            entries.reverse()
+            return self._seq, entries
+
+    # retrieve history entries, most recent first, filtering by task name,
+    # trigger condition, outcome, and time range (ISO formatted strings, the
+    # end excluded), with pagination: when a persistent store is available
+    # the query is performed there, and thus not limited to recent entries
+    def query(
+        self,
+        task: str | None = None,
+        trigger: str | None = None,
+        success: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> list[dict]:
+        store = self._store
+        if store is not None:
+            try:
+                store.flush()
+                return store.query(task, trigger, success, since, until, limit, offset)
+            except sqlite3.ProgrammingError:
+                # the store has been closed in the meantime
+                pass
+        with self._mutex:
+            entries = list(reversed(self._history))
+        result = list(
+            x
+            for x in entries
+            if (task is None or x["task"] == task)
+            and (trigger is None or x["trigger"] == trigger)
+            and (success is None or x["success"] == success)
+            and (since is None or x["time"] >= since)
+            and (until is None or x["time"] < until)
+        )
+        if limit is None:
+            return result[offset:]
+        else:
+            return result[offset : offset + limit]
+
+    # aggregates for a single task (count, outcomes, success ratio, and
+    # duration percentiles), or None if the task has never been seen
+    def task_stats(self, task: str) -> dict | None:
+        with self._mutex:
+            stats = self._stats.get(task)
+            return None if stats is None else stats.summary()
+
+    # aggregates for all tasks that have been seen
+    def all_task_stats(self) -> list[dict]:
+        with self._mutex:
+            return list(x.summary() for x in self._stats.values())
+
+    # the `count` tasks with the highest duration percentile `key`, which
+    # is one of `p50`, `p95` and `p99`
+    def slowest_tasks(self, count: int = 10, key: str = "p95") -> list[dict]:
+        stats = list(x for x in self.all_task_stats() if x[key] is not None)
+        stats.sort(key=lambda x: x[key], reverse=True)
+        return stats[:count]
 
 
 # end.
@@ -0,0 +1,210 @@
+# persistent history store
+#
+# task history records are also saved to a SQLite database, so that they
+# survive restarts and can be searched well beyond the in-memory history:
+# records are written in batches by a dedicated thread, so that ingestion
+# never waits for the disk, and the database uses WAL mode so that queries
+# can run while the writer is active
+
+
+import sqlite3
+
+from threading import Thread, Lock, Event
+from queue import SimpleQueue, Empty
+from datetime import timedelta
+
+from ..utility import get_logger
+from ..repocfg import AppConfig
+
+
+# maximum number of records written in a single transaction
+_HISTORY_DB_BATCH: int = AppConfig.get("HISTORY_DB_BATCH", 500)  # type: ignore
+
+# seconds to wait for the writer to acknowledge a flush request or to stop
+_HISTORY_DB_TIMEOUT = 5.0
+
+
+_SCHEMA = """\
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    time TEXT NOT NULL,
+    task TEXT NOT NULL,
+    task_id INTEGER,
+    trigger TEXT,
+    duration REAL,
+    success TEXT,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS history_time ON history (time);
+CREATE INDEX IF NOT EXISTS history_task ON history (task, time);
+CREATE INDEX IF NOT EXISTS history_success ON history (success, time);
+CREATE INDEX IF NOT EXISTS history_task_success ON history (task, success, time);
+CREATE INDEX IF NOT EXISTS history_trigger ON history (trigger, time);
+"""
+
+_INSERT = """\
+INSERT INTO history (time, task, task_id, trigger, duration, success, message)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_COLUMNS = "time, task, task_id, trigger, duration, success, message"
+
+
+# report that some entries could not be saved: a logger is not available
+# when the store is used by tools that do not log
+def _log_write_error(count: int, error: Exception):
+    try:
+        log = get_logger().context()
+    except AssertionError:
+        return
+    log.use(
+        emitter="FRONTEND",
+        action="history",
+        level=log.LEVEL_ERROR,
+        when=log.WHEN_PROC,
+        status=log.STATUS_ERR,
+    ).log("cannot save %s history entries: %s" % (count, error))
+
+
+# convert a history entry to a table row and back
+def _to_row(entry) -> tuple:
+    return (
+        entry["time"],
+        entry["task"],
+        entry["task_id"],
+        entry["trigger"],
+        None if entry["duration"] is None else entry["duration"].total_seconds(),
+        entry["success"],
+        entry["message"],
+    )
+
+
+def _from_row(row) -> dict:
+    return {
+        "time": row[0],
+        "task": row[1],
+        "task_id": row[2],
+        "trigger": row[3],
+        "duration": None if row[4] is None else timedelta(seconds=row[4]),
+        "success": row[5],
+        "message": row[6],
+    }
+
+
+class HistoryStore(object):
+
+    def __init__(self, filename: str):
+        self._filename = filename
+        conn = sqlite3.connect(filename)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        conn.commit()
+        conn.close()
+        # the connection used for queries may be used by any thread
+        self._reader = sqlite3.connect(filename, check_same_thread=False)
+        self._reader_mutex = Lock()
+        self._queue = SimpleQueue()
+        self._writer = Thread(target=self._write_records, daemon=True)
+        self._writer.start()
+
+    # writer thread body: `None` stops the writer, an `Event` is a request
+    # to be acknowledged once everything before it has been committed
+    def _write_records(self):
+        conn = sqlite3.connect(self._filename)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        running = True
+        while running:
+            batch = []
+            waiting = []
+            item = self._queue.get()
+            while True:
+                if item is None:
+                    running = False
+                    break
+                elif isinstance(item, Event):
+                    waiting.append(item)
+                else:
+                    batch.append(_to_row(item))
+                if len(batch) >= _HISTORY_DB_BATCH:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except Empty:
+                    break
+            if batch:
+                try:
+                    with conn:
+                        conn.executemany(_INSERT, batch)
+                except sqlite3.Error as e:
+                    _log_write_error(len(batch), e)
+            for done in waiting:
+                done.set()
+        conn.close()
+
+    # enqueue a history entry for writing
+    def add(self, entry):
+        self._queue.put(entry)
+
+    # wait until all entries added so far have been committed
+    def flush(self):
+        if self._writer.is_alive():
+            done = Event()
+            self._queue.put(done)
+            done.wait(_HISTORY_DB_TIMEOUT)
+
+    # commit pending entries and stop the writer
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(_HISTORY_DB_TIMEOUT)
+        with self._reader_mutex:
+            self._reader.close()
+
+    # retrieve history entries, most recent first, optionally filtering by
+    # task name, trigger condition, outcome (`OK`, `FAIL`, `IND`, `ABN`), and
+    # time range, where times are ISO formatted strings as in the entries
+    def query(
+        self,
+        task: str | None = None,
+        trigger: str | None = None,
+        success: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> list[dict]:
+        conditions = []
+        params = []
+        if task is not None:
+            conditions.append("task = ?")
+            params.append(task)
+        if trigger is not None:
+            conditions.append("trigger = ?")
+            params.append(trigger)
+        if success is not None:
+            conditions.append("success = ?")
+            params.append(success)
+        if since is not None:
+            conditions.append("time >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("time < ?")
+            params.append(until)
+        sql = "SELECT %s FROM history" % _COLUMNS
+        if conditions:
+            sql += " WHERE %s" % " AND ".join(conditions)
+        sql += " ORDER BY time DESC, id DESC LIMIT ? OFFSET ?"
+        params.append(-1 if limit is None else limit)
+        params.append(offset)
+        with self._reader_mutex:
+            rows = self._reader.execute(sql, params).fetchall()
+        return list(_from_row(x) for x in rows)
+
+    # the most recent `count` entries, oldest first
+    def recent(self, count: int) -> list[dict]:
+        result = self.query(limit=count)
+        result.reverse()
+        return result
+
+
+# end.
@@ -25,8 +25,14 @@
 # }
 
 
-from threading import Lock
-from datetime import datetime
+import os
+import gzip
+import time
+import shutil
+
+from threading import Thread, Event
+from queue import SimpleQueue, Empty
+from datetime import datetime, timedelta
 
 from ..i18n.strings import CLI_APP
 
@@ -36,115 +42,276 @@ from ..repocfg import AppConfig
 _LOGLEVELS = ["TRACE", "DEBUG", "INFO", "WARN", "ERROR"]
 _LOGFMT = "{time} ({application}) {level} {emitter} {action}{itemstr}: [{when}/{status}]: {message}"
 
+# records of these types are always handled, regardless of their level
+_SPECIAL_WHEN = ("HIST", "BUSY", "PAUSE")
+
+# milliseconds after which written records are flushed to disk at most
+_LOG_FLUSH_INTERVAL: float = AppConfig.get("LOG_FLUSH_INTERVAL", 500.0)  # type: ignore
+
+# number of records after which the log file is flushed anyway
+_LOG_FLUSH_BATCH: int = AppConfig.get("LOG_FLUSH_BATCH", 256)  # type: ignore
+
+# seconds to wait for the writer to acknowledge a flush request
+_LOG_FLUSH_TIMEOUT = 5.0
+
+# rotation policy: size in bytes that triggers rotation (0 to disable it),
+# whether or not to rotate when the day changes, how many rotated segments
+# to keep, and whether or not rotated segments have to be compressed
+_LOG_ROTATE_MAX_BYTES: int = AppConfig.get(
+    "LOG_ROTATE_MAX_BYTES", 16 * 1024 * 1024
+)  # type: ignore
+_LOG_ROTATE_DAILY: bool = AppConfig.get("LOG_ROTATE_DAILY", False)  # type: ignore
+_LOG_ROTATE_KEEP: int = AppConfig.get("LOG_ROTATE_KEEP", 5)  # type: ignore
+_LOG_ROTATE_COMPRESS: bool = AppConfig.get("LOG_ROTATE_COMPRESS", True)  # type: ignore
+
+
+# format a record as a line for the log file
+def _format_record(record) -> str:
+    item = record["contents"]["context"]["item"]
+    item_id = record["contents"]["context"]["item_id"]
+    if item is not None and item_id is not None:
+        itemstr = " %s/%s" % (item, item_id)
+    else:
+        itemstr = ""
+    return "%s\n" % _LOGFMT.format(
+        time=record["header"]["time"],
+        application=record["header"]["application"],
+        level=record["header"]["level"],
+        emitter=record["contents"]["context"]["emitter"],
+        action=record["contents"]["context"]["action"],
+        itemstr=itemstr,
+        when=record["contents"]["message_type"]["when"],
+        status=record["contents"]["message_type"]["status"],
+        message=record["contents"]["message"],
+    )
+
+
+# rotated segments are named after the active log file followed by the time
+# of rotation, and by a counter when more segments are rotated in the same
+# second, so that they are never renamed again
+def _rotated_name(filename: str) -> str:
+    base = "%s.%s" % (filename, datetime.now().strftime("%Y%m%d-%H%M%S"))
+    name = base
+    n = 0
+    while os.path.exists(name) or os.path.exists(name + ".gz"):
+        n += 1
+        name = "%s-%s" % (base, n)
+    return name
+
+
+# the key that sorts rotated segments chronologically: names cannot just be
+# sorted as text, because `<time>-1` would come before `<time>`, and `-10`
+# before `-2`; names that cannot be parsed are considered the oldest ones
+def _rotated_key(prefix: str, name: str) -> tuple:
+    stamp = name[len(prefix) :]
+    if stamp.endswith(".gz"):
+        stamp = stamp[:-3]
+    parts = stamp.split("-")
+    try:
+        if len(parts) == 2:
+            return (parts[0], parts[1], 0, name)
+        elif len(parts) == 3:
+            return (parts[0], parts[1], int(parts[2]), name)
+    except ValueError:
+        pass
+    return ("", "", 0, name)
+
+
+# remove the oldest rotated segments of a log file, keeping at most `keep`
+def _prune_rotated(filename: str, keep: int):
+    dirname = os.path.dirname(filename) or "."
+    prefix = os.path.basename(filename) + "."
+    segments = sorted(
+        (
+            x
+            for x in os.listdir(dirname)
+            if x.startswith(prefix) and not x.endswith(".tmp")
+        ),
+        key=lambda x: _rotated_key(prefix, x),
+    )
+    for x in segments[: max(0, len(segments) - keep)]:
+        try:
+            os.remove(os.path.join(dirname, x))
+        except OSError:
+            pass
+
+
+# compress rotated segments and prune old ones in a separate thread, so that
+# the writer thread is only delayed by renaming the active log file
+class _Compressor(object):
+
+    def __init__(self, filename: str, keep: int, compress: bool):
+        self._filename = filename
+        self._keep = keep
+        self._compress = compress
+        self._queue = SimpleQueue()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            segment = self._queue.get()
+            if segment is None:
+                break
+            if self._compress:
+                try:
+                    tmpname = segment + ".gz.tmp"
+                    with open(segment, "rb") as src:
+                        with gzip.open(tmpname, "wb") as dst:
+                            shutil.copyfileobj(src, dst)
+                    os.replace(tmpname, segment + ".gz")
+                    os.remove(segment)
+                except OSError:
+                    pass
+            _prune_rotated(self._filename, self._keep)
+
+    def submit(self, segment: str):
+        self._queue.put(segment)
 
-# for now a very basic logger: improvements will be rotation and persistence
+    def stop(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(_LOG_FLUSH_TIMEOUT)
+
+
+# the log file is written by a dedicated thread, so that callers (the reader
+# thread and the main loop) only have to enqueue the records to be written:
+# the writer flushes the file after a batch of records has been written, or
+# when no new record arrives within the flush interval, and never wakes up
+# when there is nothing to write; the writer also rotates the log file when
+# it grows too large or when the day changes, and the log of the previous
+# session is rotated on startup instead of being overwritten
 class Logger(object):
 
     def __init__(self, filename, level, app=None):
-        self._logfile = open(filename, "w")
+        self._filename = filename
+        self._compressor = _Compressor(
+            filename, _LOG_ROTATE_KEEP, _LOG_ROTATE_COMPRESS
+        )
+        if os.path.isfile(filename) and os.path.getsize(filename) > 0:
+            self._rotate_file()
+        self._open_file()
         self._level = level
         self._level_num = _LOGLEVELS.index(self._level)
         self._app = app
-        self._mutex = Lock()
+        self._queue = SimpleQueue()
+        self._writer = Thread(target=self._write_records, daemon=True)
+        self._writer.start()
 
-    def log(self, record) -> bool:
-        with self._mutex:
-            time = record["header"]["time"]
-            application = record["header"]["application"]
-            level = record["header"]["level"]
-            emitter = record["contents"]["context"]["emitter"]
-            action = record["contents"]["context"]["action"]
-            item = record["contents"]["context"]["item"]
-            item_id = record["contents"]["context"]["item_id"]
-            when = record["contents"]["message_type"]["when"]
-            status = record["contents"]["message_type"]["status"]
-            message = record["contents"]["message"]
-            if item is not None and item_id is not None:
-                itemstr = " %s/%s" % (item, item_id)
-            else:
-                itemstr = ""
-            ln = _LOGLEVELS.index(level)
-            if when == "HIST":
-                if AppConfig.get("DEBUG"):
-                    self._logfile.write(
-                        "%s\n"
-                        % _LOGFMT.format(
-                            time=time,
-                            application=application,
-                            level=level,
-                            emitter=emitter,
-                            action=action,
-                            itemstr=itemstr,
-                            when=when,
-                            status=status,
-                            message=message,
-                        )
-                    )
-                    self._logfile.flush()
-                return False
-            elif when == "BUSY":
-                if AppConfig.get("DEBUG"):
-                    self._logfile.write(
-                        "%s\n"
-                        % _LOGFMT.format(
-                            time=time,
-                            application=application,
-                            level=level,
-                            emitter=emitter,
-                            action=action,
-                            itemstr=itemstr,
-                            when=when,
-                            status=status,
-                            message=message,
-                        )
-                    )
-                    self._logfile.flush()
-                if self._app:
-                    if status == "YES":
-                        self._app.send_event("<<SchedSetBusy>>")
-                    else:
-                        self._app.send_event("<<SchedSetNotBusy>>")
-            elif when == "PAUSE":
-                if AppConfig.get("DEBUG"):
-                    self._logfile.write(
-                        "%s\n"
-                        % _LOGFMT.format(
-                            time=time,
-                            application=application,
-                            level=level,
-                            emitter=emitter,
-                            action=action,
-                            itemstr=itemstr,
-                            when=when,
-                            status=status,
-                            message=message,
-                        )
-                    )
-                    self._logfile.flush()
-                if self._app:
-                    if status == "YES":
-                        self._app.send_event("<<SchedSetPaused>>")
-                    else:
-                        self._app.send_event("<<SchedSetNotPaused>>")
+    # open a new active log file and set the limits for its rotation
+    def _open_file(self):
+        self._logfile = open(self._filename, "w", encoding="utf-8")
+        self._written = 0
+        tomorrow = datetime.now().date() + timedelta(days=1)
+        self._rotate_at = datetime.combine(tomorrow, datetime.min.time()).timestamp()
+
+    # move the active log file aside and schedule it for compression
+    def _rotate_file(self):
+        segment = _rotated_name(self._filename)
+        try:
+            os.replace(self._filename, segment)
+        except OSError:
+            return
+        self._compressor.submit(segment)
+
+    # check whether the active log file has to be rotated, and do it
+    def _check_rotation(self):
+        if (_LOG_ROTATE_MAX_BYTES > 0 and self._written >= _LOG_ROTATE_MAX_BYTES) or (
+            _LOG_ROTATE_DAILY and time.time() >= self._rotate_at
+        ):
+            self._logfile.close()
+            self._rotate_file()
+            self._open_file()
+
+    # writer thread body: `None` in the queue stops the writer, an `Event`
+    # is a flush request to be acknowledged, anything else is a record
+    def _write_records(self):
+        interval = _LOG_FLUSH_INTERVAL / 1000.0
+        pending = 0
+        while True:
+            try:
+                item = self._queue.get(timeout=interval if pending else None)
+            except Empty:
+                self._logfile.flush()
+                pending = 0
+                continue
+            if item is None:
+                self._logfile.flush()
+                break
+            elif isinstance(item, Event):
+                self._logfile.flush()
+                pending = 0
+                item.set()
             else:
-                if ln >= self._level_num:
-                    self._logfile.write(
-                        "%s\n"
-                        % _LOGFMT.format(
-                            time=time,
-                            application=application,
-                            level=level,
-                            emitter=emitter,
-                            action=action,
-                            itemstr=itemstr,
-                            when=when,
-                            status=status,
-                            message=message,
-                        )
-                    )
+                line = _format_record(item)
+                self._logfile.write(line)
+                # the limit is in bytes, and records may contain non-ASCII text
+                self._written += len(line.encode("utf-8"))
+                pending += 1
+                if pending >= _LOG_FLUSH_BATCH:
                     self._logfile.flush()
+                    pending = 0
+                self._check_rotation()
+
+    # only enqueue the record: formatting and writing is up to the writer
+    def _write(self, record):
+        self._queue.put(record)
+
+    # wait until all records enqueued so far have been written to disk
+    def flush(self):
+        if self._writer.is_alive():
+            done = Event()
+            self._queue.put(done)
+            done.wait(_LOG_FLUSH_TIMEOUT)
+
+    # write all pending records, stop the writer and close the log file
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(_LOG_FLUSH_TIMEOUT)
+        if not self._writer.is_alive() and not self._logfile.closed:
+            self._logfile.close()
+        self._compressor.stop()
+
+    # tell whether or not a record with the given level and type would have
+    # any effect when logged: used to discard records before decoding them
+    def accepts(self, level: str, when: str) -> bool:
+        if when in _SPECIAL_WHEN:
+            return True
+        try:
+            return _LOGLEVELS.index(level) >= self._level_num
+        except ValueError:
             return True
 
+    def log(self, record) -> bool:
+        level = record["header"]["level"]
+        when = record["contents"]["message_type"]["when"]
+        status = record["contents"]["message_type"]["status"]
+        if when == "HIST":
+            if AppConfig.get("DEBUG"):
+                self._write(record)
+            return False
+        elif when == "BUSY":
+            if AppConfig.get("DEBUG"):
+                self._write(record)
+            if self._app:
+                if status == "YES":
+                    self._app.send_event("<<SchedSetBusy>>")
+                else:
+                    self._app.send_event("<<SchedSetNotBusy>>")
+        elif when == "PAUSE":
+            if AppConfig.get("DEBUG"):
+                self._write(record)
+            if self._app:
+                if status == "YES":
+                    self._app.send_event("<<SchedSetPaused>>")
+                else:
+                    self._app.send_event("<<SchedSetNotPaused>>")
+        else:
+            if _LOGLEVELS.index(level) >= self._level_num:
+                self._write(record)
+        return True
+
     # return a valid logging context
     def context(self):
         return Context(logger=self)
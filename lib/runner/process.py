@@ -1,39 +1,115 @@
 # scheduler runner: implementation of the scheduler runner along with a
 # secondary thread dedicated to reading its output
 
+import os
+import re
 import sys
 import time
 import subprocess
 import threading
 
-import json
+from concurrent.futures import Future
 
-from ..utility import get_logger
+from ..utility import get_logger, get_history_dbfile
 
 from .history import History
+from .historydb import HistoryStore
+from .decoder import decode_record, decoder_name, DecodeError
+from .commands import CommandTracker
 
 from ..repocfg import AppConfig
 
 
 # some constants:
 
-# milliseconds between log reads
+# milliseconds to wait for the scheduler to settle on startup and shutdown
 _MSECS_BETWEEN_READS: float = AppConfig.get("MSECS_BETWEEN_READS", 100.0)  # type: ignore
 
+# maximum number of bytes consumed from the output pipe in a single read
+_LOG_READ_CHUNK_SIZE: int = AppConfig.get("LOG_READ_CHUNK_SIZE", 65536)  # type: ignore
+
+# maximum number of bytes of the scheduler stderr that are kept in memory
+_STDERR_BUFFER_SIZE: int = AppConfig.get("STDERR_BUFFER_SIZE", 65536)  # type: ignore
+
 # max length of task execution history
 _HISTORY_LENGTH: int = AppConfig.get("HISTORY_LENGTH")  # type: ignore
 
 
+# matchers used to classify a raw record without decoding it: keys in the
+# JSON text cannot be mistaken for escaped quotes in the message, as in the
+# latter case the quote following the key name would be preceded by a `\`
+_RE_RECORD_LEVEL = re.compile(rb'"level"\s*:\s*"([A-Z]+)"')
+_RE_RECORD_WHEN = re.compile(rb'"when"\s*:\s*"([A-Z]+)"')
+
+
 # the following function will be used to start a thread that actually
-# reads subprocess output and possibly provides input to the subprocess
-# itself: it has to be aware of the wrapper instance that calls it
+# reads subprocess output: it has to be aware of the wrapper instance that
+# calls it; the read on the raw pipe descriptor blocks until some bytes are
+# available (so that the thread never wakes up while the scheduler is quiet)
+# and returns whatever has been written so far, which is split into complete
+# lines that are handled as a batch: an incomplete trailing line is kept and
+# completed by the following reads, and since records are separated by a
+# newline byte there is no risk to break a multibyte UTF-8 sequence
 def _logreader(wrapper):
     pipe = wrapper.pipe()
-    sleep_seconds = _MSECS_BETWEEN_READS / 1000.0
-    while wrapper.running():
-        for line in iter(pipe.stdout.readline, ""):
-            wrapper.process_output(line.strip())
-        time.sleep(sleep_seconds)
+    fd = pipe.stdout.fileno()
+    pending = b""
+    while True:
+        try:
+            chunk = os.read(fd, _LOG_READ_CHUNK_SIZE)
+        except OSError:
+            chunk = b""
+        if not chunk:
+            # end of file: the scheduler has exited or closed its output
+            if pending.strip():
+                wrapper.process_output_batch([pending])
+            wrapper.commands().abandon("the scheduler exited")
+            wrapper.output_closed()
+            break
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        if lines:
+            wrapper.process_output_batch(lines)
+
+
+# this thread only drains the scheduler stderr, so that the pipe never fills
+# up and blocks the scheduler when it writes diagnostics: the output is not
+# interpreted, only the last part of it is kept in a bounded buffer
+def _errreader(wrapper):
+    pipe = wrapper.pipe()
+    fd = pipe.stderr.fileno()
+    while True:
+        try:
+            chunk = os.read(fd, _LOG_READ_CHUNK_SIZE)
+        except OSError:
+            chunk = b""
+        if not chunk:
+            break
+        wrapper.stderr_buffer().append(chunk)
+
+
+# a bounded byte buffer that only retains the most recent data written to it
+class _TailBuffer(object):
+
+    def __init__(self, maxsize: int):
+        self._data = bytearray()
+        self._maxsize = maxsize
+        self._mutex = threading.Lock()
+
+    def append(self, chunk: bytes):
+        with self._mutex:
+            self._data += chunk
+            excess = len(self._data) - self._maxsize
+            if excess > 0:
+                del self._data[:excess]
+
+    def get(self) -> bytes:
+        with self._mutex:
+            return bytes(self._data)
+
+    def clear(self):
+        with self._mutex:
+            self._data.clear()
 
 
 # wrapper around the scheduler process
@@ -42,35 +118,283 @@ class Wrapper(object):
     def __init__(self, configpath: str, exepath: str, app=None):
         self._exepath = exepath
         self._config = configpath
-        self._history = History(_HISTORY_LENGTH)
         self._logger = get_logger()
         self._thread = None
+        self._errthread = None
+        self._stderr = _TailBuffer(_STDERR_BUFFER_SIZE)
         self._pipe = None
+        self._stdin_mutex = threading.Lock()
+        self._decode_errors = 0
+        self._started = threading.Event()
+        self._collected = False
+        self._collect_mutex = threading.Lock()
+        self._commands = CommandTracker()
         self._running = False
-        self._log = self._logger.context().use(emitter="FRONTEND")
+        store = None
+        if AppConfig.get("HISTORY_DB"):
+            try:
+                store = HistoryStore(get_history_dbfile())
+            except Exception as e:
+                self._log.use(
+                    action="startup",
+                    level=self._log.LEVEL_WARNING,
+                    when=self._log.WHEN_START,
+                    status=self._log.STATUS_ERR,
+                ).log("history database not available: %s" % e)
+        self._history = History(_HISTORY_LENGTH, store)
+        self._app = app
         if app is not None:
             app.set_wrapper(self)
 
+    # a new logging context for every message: contexts are modified by
+    # `use()`, and the wrapper is used by several threads (the main loop, the
+    # log reader and the control connections), that must not share one
+    @property
+    def _log(self):
+        return self._logger.context().use(emitter="FRONTEND")
+
     # used by the log reader
-    def pipe(self) -> None | subprocess.Popen[str]:
+    def pipe(self) -> None | subprocess.Popen[bytes]:
         return self._pipe
 
     def running(self) -> bool:
         return self._running and self._pipe is not None
 
+    # used by the log reader, to correlate records with commands
+    def commands(self) -> CommandTracker:
+        return self._commands
+
+    # used by the stderr reader
+    def stderr_buffer(self) -> _TailBuffer:
+        return self._stderr
+
+    # the last part of what the scheduler wrote to stderr, as text
+    def get_stderr(self) -> str:
+        return self._stderr.get().decode("utf-8", errors="replace")
+
+    # copy the captured stderr to the log, once the scheduler has exited
+    def _dump_stderr(self):
+        if self._errthread:
+            self._errthread.join()
+        text = self.get_stderr()
+        if text.strip():
+            log = self._logger.context().use(
+                emitter="FRONTEND",
+                action="stderr",
+                level=self._log.LEVEL_WARNING,
+                when=self._log.WHEN_END,
+                status=self._log.STATUS_MSG,
+            )
+            for line in text.splitlines():
+                if line.strip():
+                    log.log("scheduler stderr: %s" % line.rstrip())
+        self._stderr.clear()
+
+    # number of lines of scheduler output that could not be decoded
+    def decode_errors(self) -> int:
+        return self._decode_errors
+
     # used by the tray menu to feed the history box
     def get_history(self):
         return self._history.get_copy()
 
-    # use the logger to determine whether a line is pertinent to history
-    def process_output(self, line: str | None):
+    # the task history itself, for queries and aggregates
+    def history(self) -> History:
+        return self._history
+
+    # only retrieve the history entries that follow the one numbered `seq`,
+    # along with the sequence number of the most recent entry
+    def get_history_since(self, seq: int):
+        return self._history.get_since(seq)
+
+    # quickly determine from the raw line whether the record would just be
+    # dropped by the logger: when the line cannot be classified it is kept,
+    # and so is every line while some command waits for an acknowledgement
+    def _discardable(self, line: bytes) -> bool:
+        if self._commands.pending():
+            return False
+        level = _RE_RECORD_LEVEL.search(line)
+        when = _RE_RECORD_WHEN.search(line)
+        if level is None or when is None:
+            return False
+        return not self._logger.accepts(
+            level.group(1).decode("ascii"),
+            when.group(1).decode("ascii"),
+        )
+
+    # use the logger to determine whether a line is pertinent to history:
+    # lines are accepted both as text and as raw bytes read from the pipe,
+    # and in the latter case records that would be dropped are not decoded
+    def process_output(self, line: str | bytes | None):
         if line:
-            log_record = json.loads(line)
-            if not self._logger.log(log_record):
-                self._history.append(log_record)
+            line = line.strip()
+            if line:
+                if isinstance(line, bytes) and self._discardable(line):
+                    return
+                try:
+                    log_record = decode_record(line)
+                except DecodeError as e:
+                    # a malformed line must not stop ingestion, but is counted
+                    # and the first one is logged, so that a decoder that does
+                    # not work can be diagnosed
+                    self._decode_errors += 1
+                    if self._decode_errors == 1:
+                        self._logger.context().use(
+                            emitter="FRONTEND",
+                            action="decode",
+                            level=self._log.LEVEL_DEBUG,
+                            when=self._log.WHEN_PROC,
+                            status=self._log.STATUS_ERR,
+                        ).log(
+                            "cannot decode scheduler output (%s decoder): %s"
+                            % (decoder_name(), e)
+                        )
+                    return
+                self._commands.acknowledge(log_record)
+                if not self._logger.log(log_record):
+                    seq = self._history.last_seq()
+                    self._history.append(log_record)
+                    # notify the application that new entries are available
+                    if self._app and self._history.last_seq() != seq:
+                        self._app.send_event("<<HistoryUpdated>>")
+
+    # handle a batch of lines that have been read at once
+    def process_output_batch(self, lines: list[bytes] | list[str]):
+        for line in lines:
+            self.process_output(line)
+
+    # clean up after the scheduler has exited on its own: let the reader
+    # consume what has been written, log the stderr tail (that usually holds
+    # the reason) and, as on shutdown, save what has been recorded so far
+    # (this is done only once, and may be called by the reader itself)
+    def collect_exited(self):
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        with self._collect_mutex:
+            if self._collected:
+                return
+            self._collected = True
+        self._running = False
+        self._dump_stderr()
+        self._history.abandon_all()
+        self._history.close()
+        self._logger.flush()
+
+    # called by the reader when the scheduler output is closed: unless the
+    # scheduler has been asked to exit, it has died on its own, and then what
+    # it left is collected and the application is notified
+    def output_closed(self):
+        self._started.wait()
+        if not self._running:
+            return
+        try:
+            code = self._pipe.wait(_MSECS_BETWEEN_READS / 1000.0)  # type: ignore
+        except subprocess.TimeoutExpired:
+            return
+        self._log.use(
+            action="shutdown",
+            level=self._log.LEVEL_ERROR,
+            when=self._log.WHEN_END,
+            status=self._log.STATUS_ERR,
+        ).log("scheduler exited unexpectedly (exit code: %s)" % code)
+        self.collect_exited()
+        if self._app is not None:
+            self._app.send_event("<<SchedExited>>")
+
+    # send a command line to the scheduler
+    # commands may be sent by different threads (the main loop and control
+    # connections), and each one must be written as a whole
+    def _send_command(self, command: str):
+        with self._stdin_mutex:
+            self._pipe.stdin.write(("%s\n" % command).encode("utf-8"))  # type: ignore
+            self._pipe.stdin.flush()  # type: ignore
+
+    # the argument of a command, if any, as the scheduler expects it
+    def _command_line(self, command: str, name: str | None) -> str:
+        if command == "configure":
+            return "configure %s" % self._config
+        elif name is not None:
+            return "%s %s" % (command, name)
+        else:
+            return command
+
+    # log the outcome of a command, so that refusals are never silent
+    def _log_outcome(self, command: str, name: str | None, future: Future):
+        what = "`%s`" % (command if name is None else "%s %s" % (command, name))
+        error = future.exception()
+        if error is None:
+            self._log.use(
+                action="command",
+                level=self._log.LEVEL_DEBUG,
+                when=self._log.WHEN_PROC,
+                status=self._log.STATUS_OK,
+            ).log("command %s acknowledged" % what)
+        elif isinstance(error, TimeoutError):
+            self._log.use(
+                action="command",
+                level=self._log.LEVEL_DEBUG,
+                when=self._log.WHEN_PROC,
+                status=self._log.STATUS_MSG,
+            ).log("command %s not acknowledged in time" % what)
+        else:
+            self._log.use(
+                action="command",
+                level=self._log.LEVEL_WARNING,
+                when=self._log.WHEN_PROC,
+                status=self._log.STATUS_ERR,
+            ).log("command %s failed: %s" % (what, error))
+
+    # send several commands at once, and return a future for each of them:
+    # `commands` is a list of (command, name) pairs, where the command is one
+    # of the commands understood by the scheduler (such as `trigger`), and
+    # the name is the item it applies to, or None; all commands are written
+    # with a single write, and every future resolves to the message that
+    # acknowledged the command, or fails with `CommandError` when it is
+    # refused and with `TimeoutError` when it is not acknowledged in time
+    def submit_commands(
+        self,
+        commands: list[tuple[str, str | None]],
+        timeout: float | None = None,
+    ) -> list[Future]:
+        futures = []
+        for command, name in commands:
+            item = None if command in ("configure", "reset_conditions") else name
+            future = self._commands.register(command, item, timeout)
+            future.add_done_callback(
+                lambda f, c=command, n=name: self._log_outcome(c, n, f)
+            )
+            futures.append(future)
+        if not commands:
+            return futures
+        if self._pipe is None or self._pipe.poll() is not None or not self._thread:
+            self._commands.fail(futures, "no active scheduler")
+            return futures
+        # the commands are registered before being written, so that an early
+        # acknowledgement cannot be missed
+        data = "".join(
+            "%s\n" % self._command_line(command, name) for command, name in commands
+        )
+        try:
+            with self._stdin_mutex:
+                self._pipe.stdin.write(data.encode("utf-8"))  # type: ignore
+                self._pipe.stdin.flush()  # type: ignore
+        except OSError as e:
+            self._commands.fail(futures, "cannot send commands: %s" % e)
+        return futures
+
+    # send a single command, and return its future
+    def submit_command(
+        self,
+        command: str,
+        name: str | None = None,
+        timeout: float | None = None,
+    ) -> Future:
+        return self.submit_commands([(command, name)], timeout)[0]
 
     # the following functions, which have a `whenever_` prefix, are actually
-    # commands that are sent to the spawned **whenever** process
+    # commands that are sent to the spawned **whenever** process: they only
+    # report whether the command could be sent (use `submit_command` to wait
+    # for its outcome)
     def whenever_exit(self) -> bool:
         if self._pipe is None:
             self._log.use(
@@ -88,27 +412,29 @@ class Wrapper(object):
                 when=self._log.WHEN_END,
                 status=self._log.STATUS_MSG,
             ).log("shutdown the scheduler, waiting for activity to finish")
-            self._pipe.stdin.write("exit\n")  # type: ignore
-            self._pipe.stdin.flush()  # type: ignore
             self._running = False
+            self._send_command("exit")
             time.sleep(sleep_seconds)
-            self._thread.join()
-            for line in iter(self._pipe.stdout.readline, ""):  # type: ignore
-                self.process_output(line.strip())
+            # the reader consumes all remaining output before returning
+            self.collect_exited()
             self._log.use(
                 action="shutdown",
                 level=self._log.LEVEL_INFO,
                 when=self._log.WHEN_END,
                 status=self._log.STATUS_OK,
             ).log("scheduler successfully exited")
+            self._logger.flush()
             return True
         else:
-            self._log.use(
-                action="shutdown",
-                level=self._log.LEVEL_ERROR,
-                when=self._log.WHEN_END,
-                status=self._log.STATUS_FAIL,
-            ).log("no active scheduler, failed to shut down")
+            # unless already reported, the scheduler has died on its own
+            if not self._collected:
+                self._log.use(
+                    action="shutdown",
+                    level=self._log.LEVEL_ERROR,
+                    when=self._log.WHEN_END,
+                    status=self._log.STATUS_FAIL,
+                ).log("no active scheduler, failed to shut down")
+            self.collect_exited()
             return False
 
     def whenever_kill(self) -> bool:
@@ -128,25 +454,28 @@ class Wrapper(object):
                 when=self._log.WHEN_END,
                 status=self._log.STATUS_MSG,
             ).log("shutdown the scheduler, forcing end of all activity")
-            self._pipe.stdin.write("kill\n")  # type: ignore
-            self._pipe.stdin.flush()  # type: ignore
             self._running = False
+            self._send_command("kill")
             time.sleep(sleep_seconds)
-            self._thread.join()
+            self.collect_exited()
             self._log.use(
                 action="shutdown",
                 level=self._log.LEVEL_INFO,
                 when=self._log.WHEN_END,
                 status=self._log.STATUS_OK,
             ).log("scheduler successfully exited")
+            self._logger.flush()
             return True
         else:
-            self._log.use(
-                action="shutdown",
-                level=self._log.LEVEL_ERROR,
-                when=self._log.WHEN_END,
-                status=self._log.STATUS_FAIL,
-            ).log("no active scheduler, failed to shut down")
+            # unless already reported, the scheduler has died on its own
+            if not self._collected:
+                self._log.use(
+                    action="shutdown",
+                    level=self._log.LEVEL_ERROR,
+                    when=self._log.WHEN_END,
+                    status=self._log.STATUS_FAIL,
+                ).log("no active scheduler, failed to shut down")
+            self.collect_exited()
             return False
 
     def whenever_pause(self) -> bool:
@@ -165,8 +494,7 @@ class Wrapper(object):
             status=self._log.STATUS_MSG,
         ).log("attempting to pause the scheduler")
         if self._pipe.poll() is None and self._thread:
-            self._pipe.stdin.write("pause\n")  # type: ignore
-            self._pipe.stdin.flush()  # type: ignore
+            self._send_command("pause")
             return True
         else:
             self._log.use(
@@ -193,8 +521,7 @@ class Wrapper(object):
             status=self._log.STATUS_MSG,
         ).log("attempting to resume the scheduler")
         if self._pipe.poll() is None and self._thread:
-            self._pipe.stdin.write("resume\n")  # type: ignore
-            self._pipe.stdin.flush()  # type: ignore
+            self._send_command("resume")
             return True
         else:
             self._log.use(
@@ -224,8 +551,7 @@ class Wrapper(object):
             % ("ALL" if len(names) == 0 else ", ".join(list("`%s`" % x for x in names)))
         )
         if self._pipe.poll() is None and self._thread:
-            self._pipe.stdin.write("reset_conditions %s\n" % " ".join(names))  # type: ignore
-            self._pipe.stdin.flush()  # type: ignore
+            self._send_command("reset_conditions %s" % " ".join(names))
             return True
         else:
             self._log.use(
@@ -252,8 +578,7 @@ class Wrapper(object):
             status=self._log.STATUS_MSG,
         ).log("attempting to suspend condition `%s`" % name)
         if self._pipe.poll() is None and self._thread:
-            self._pipe.stdin.write("suspend_condition %s\n" % name)  # type: ignore
-            self._pipe.stdin.flush()  # type: ignore
+            self._send_command("suspend_condition %s" % name)
             return True
         else:
             self._log.use(
@@ -280,8 +605,7 @@ class Wrapper(object):
             status=self._log.STATUS_MSG,
         ).log("attempting to resume condition `%s`" % name)
         if self._pipe.poll() is None and self._thread:
-            self._pipe.stdin.write("resume_condition %s\n" % name)  # type: ignore
-            self._pipe.stdin.flush()  # type: ignore
+            self._send_command("resume_condition %s" % name)
             return True
         else:
             self._log.use(
@@ -308,8 +632,7 @@ class Wrapper(object):
             status=self._log.STATUS_MSG,
         ).log("attempting to reload configuration")
         if self._pipe.poll() is None and self._thread:
-            self._pipe.stdin.write("configure %s\n" % self._config)  # type: ignore
-            self._pipe.stdin.flush()  # type: ignore
+            self._send_command("configure %s" % self._config)
             return True
         else:
             self._log.use(
@@ -336,8 +659,7 @@ class Wrapper(object):
             status=self._log.STATUS_MSG,
         ).log("attempting to trigger event `%s`" % name)
         if self._pipe.poll() is None and self._thread:
-            self._pipe.stdin.write("trigger %s\n" % name)  # type: ignore
-            self._pipe.stdin.flush()  # type: ignore
+            self._send_command("trigger %s" % name)
             return True
         else:
             self._log.use(
@@ -356,20 +678,26 @@ class Wrapper(object):
             when=self._log.WHEN_START,
             status=self._log.STATUS_MSG,
         ).log("starting the scheduler")
-        self._pipe = subprocess.Popen(
-            [self._exepath, "--log-level", "trace", "--log-json", self._config],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-            text=True,
-            creationflags=(
-                subprocess.CREATE_NO_WINDOW if sys.platform.startswith("win") else 0
-            ),
-        )
+        try:
+            self._pipe = subprocess.Popen(
+                [self._exepath, "--log-level", "trace", "--log-json", self._config],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                creationflags=(
+                    subprocess.CREATE_NO_WINDOW
+                    if sys.platform.startswith("win")
+                    else 0
+                ),
+            )
+        except OSError:
+            self._history.close()
+            raise
         self._thread = threading.Thread(target=_logreader, args=[self])
+        self._errthread = threading.Thread(target=_errreader, args=[self])
         self._running = True
         self._thread.start()
+        self._errthread.start()
         sleep_seconds = _MSECS_BETWEEN_READS / 1000.0
         time.sleep(sleep_seconds)
         if self._pipe.poll() is not None:
@@ -380,9 +708,9 @@ class Wrapper(object):
                     when=self._log.WHEN_START,
                     status=self._log.STATUS_ERR,
                 ).log("scheduler exited unexpectedly")
-                for line in iter(self._pipe.stdout.readline, ""):  # type: ignore
-                    self.process_output(line.strip())
             self._running = False
+            self._started.set()
+            self.collect_exited()
             return False
         self._log.use(
             action="startup",
@@ -390,6 +718,7 @@ class Wrapper(object):
             when=self._log.WHEN_START,
             status=self._log.STATUS_OK,
         ).log("scheduler successfully started")
+        self._started.set()
         return True
 
 
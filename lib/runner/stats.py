@@ -0,0 +1,118 @@
+# task execution statistics
+#
+# aggregates are updated as history entries arrive, so that summaries such
+# as the slowest tasks never require to scan the history: durations are kept
+# in a logarithmically bucketed histogram (in the style of DDSketch), whose
+# quantiles have a bounded relative error and that can be merged with other
+# histograms of the same accuracy by just adding the counts of the buckets
+
+
+import math
+
+
+# relative accuracy of the duration quantiles
+_DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# durations below this number of seconds are considered zero
+_MIN_DURATION = 1e-6
+
+# outcome of executions whose end has not been received
+OUTCOME_ABANDONED = "ABN"
+
+
+class DurationSketch(object):
+
+    def __init__(self, relative_accuracy: float = _DEFAULT_RELATIVE_ACCURACY):
+        self._accuracy = relative_accuracy
+        self._gamma = (1.0 + relative_accuracy) / (1.0 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._bins = {}
+        self._zeros = 0
+        self._count = 0
+
+    def add(self, seconds: float):
+        self._count += 1
+        if seconds < _MIN_DURATION:
+            self._zeros += 1
+        else:
+            k = math.ceil(math.log(seconds) / self._log_gamma)
+            self._bins[k] = self._bins.get(k, 0) + 1
+
+    def merge(self, other: "DurationSketch"):
+        if other._accuracy != self._accuracy:
+            raise ValueError("cannot merge sketches with different accuracy")
+        self._count += other._count
+        self._zeros += other._zeros
+        for k, n in other._bins.items():
+            self._bins[k] = self._bins.get(k, 0) + n
+
+    def count(self) -> int:
+        return self._count
+
+    # estimate the `q` quantile (0 <= q <= 1), None if there is no data
+    def quantile(self, q: float) -> float | None:
+        if self._count == 0:
+            return None
+        rank = q * (self._count - 1)
+        seen = self._zeros
+        if rank < seen:
+            return 0.0
+        for k in sorted(self._bins):
+            seen += self._bins[k]
+            if rank < seen:
+                return 2.0 * self._gamma**k / (self._gamma + 1.0)
+        k = max(self._bins)
+        return 2.0 * self._gamma**k / (self._gamma + 1.0)
+
+
+# running aggregates for a single task
+class TaskStats(object):
+
+    def __init__(self, task: str):
+        self.task = task
+        self.count = 0
+        self.outcomes = {}
+        self.durations = DurationSketch()
+        self.last_time = None
+
+    def add(self, entry):
+        self.count += 1
+        outcome = entry["success"]
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        # the duration of an abandoned execution only measures how long it
+        # was tracked before being given up, thus it is not a run time
+        if entry["duration"] is not None and outcome != OUTCOME_ABANDONED:
+            self.durations.add(entry["duration"].total_seconds())
+        if self.last_time is None or entry["time"] > self.last_time:
+            self.last_time = entry["time"]
+
+    def merge(self, other: "TaskStats"):
+        self.count += other.count
+        for k, n in other.outcomes.items():
+            self.outcomes[k] = self.outcomes.get(k, 0) + n
+        self.durations.merge(other.durations)
+        if other.last_time is not None and (
+            self.last_time is None or other.last_time > self.last_time
+        ):
+            self.last_time = other.last_time
+
+    def success_ratio(self) -> float | None:
+        if self.count == 0:
+            return None
+        return self.outcomes.get("OK", 0) / self.count
+
+    # a plain summary of the aggregates
+    def summary(self) -> dict:
+        return {
+            "task": self.task,
+            "count": self.count,
+            "outcomes": dict(self.outcomes),
+            "success_ratio": self.success_ratio(),
+            "p50": self.durations.quantile(0.50),
+            "p95": self.durations.quantile(0.95),
+            "p99": self.durations.quantile(0.99),
+            "last_time": self.last_time,
+        }
+
+
+# end.
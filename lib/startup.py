@@ -0,0 +1,128 @@
+# startup orchestrator
+#
+# the steps needed to start the application are mostly independent from each
+# other (probing the scheduler, preparing the data directory, and so on), so
+# that they can run in parallel on a small thread pool: each step states the
+# steps it depends on, and only runs once these have completed successfully;
+# when a step fails (or exits) the steps that depend on it fail in the same
+# way, and the error is raised again when the result of any of them is read.
+# Steps that have to run in the main thread (such as the creation of the Tk
+# root) can be timed as phases, so that the timings of the whole sequence
+# are recorded in the same place.
+
+from concurrent.futures import ThreadPoolExecutor, Future
+from threading import Lock, current_thread
+from time import perf_counter
+
+from .repocfg import AppConfig
+
+
+# maximum number of steps running at the same time
+_STARTUP_WORKERS: int = AppConfig.get("STARTUP_WORKERS", 4)  # type: ignore
+
+
+# timing of a phase: time is measured in seconds from orchestrator creation
+class PhaseTiming(object):
+
+    def __init__(self, name: str, start: float, elapsed: float, thread: str):
+        self.name = name
+        self.start = start
+        self.elapsed = elapsed
+        self.thread = thread
+
+
+# context manager used to time work that is performed in the calling thread
+class _Phase(object):
+
+    def __init__(self, startup, name: str):
+        self._startup = startup
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self._startup._record(self._name, self._start, perf_counter())
+        return False
+
+
+class Startup(object):
+
+    def __init__(self, workers: int = _STARTUP_WORKERS):
+        self._origin = perf_counter()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="startup"
+        )
+        self._steps = {}
+        self._timings = []
+        self._mutex = Lock()
+
+    def _record(self, name: str, start: float, end: float):
+        with self._mutex:
+            self._timings.append(
+                PhaseTiming(
+                    name,
+                    start - self._origin,
+                    end - start,
+                    current_thread().name,
+                )
+            )
+
+    # add a step and start it as soon as possible: dependencies must have
+    # been added before, so that steps are queued in an order that allows
+    # each of them to wait for its dependencies without blocking the pool
+    def add(self, name: str, function, after: list[str] | tuple = ()) -> Future:
+        if name in self._steps:
+            raise ValueError("step `%s` already defined" % name)
+        for dep in after:
+            if dep not in self._steps:
+                raise ValueError("unknown dependency `%s` for step `%s`" % (dep, name))
+        deps = list(self._steps[x] for x in after)
+
+        def run():
+            for f in deps:
+                f.result()
+            start = perf_counter()
+            try:
+                return function()
+            finally:
+                self._record(name, start, perf_counter())
+
+        future = self._executor.submit(run)
+        self._steps[name] = future
+        return future
+
+    # wait for a step to finish and return its result, raising its error (or
+    # the error of one of its dependencies) if any
+    def result(self, name: str):
+        return self._steps[name].result()
+
+    # wait for all steps, raising the first error in order of definition
+    def wait(self):
+        for future in list(self._steps.values()):
+            future.result()
+
+    # time work performed in the calling thread: `with startup.phase(name):`
+    def phase(self, name: str) -> _Phase:
+        return _Phase(self, name)
+
+    # the recorded timings, in order of start
+    def timings(self) -> list[PhaseTiming]:
+        with self._mutex:
+            return sorted(self._timings, key=lambda x: x.start)
+
+    # seconds elapsed since the orchestrator was created
+    def elapsed(self) -> float:
+        return perf_counter() - self._origin
+
+    # release the worker threads once all steps are done
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+__all__ = ["Startup", "PhaseTiming"]
+
+
+# end.
@@ -0,0 +1,291 @@
+# diag_startup.py
+#
+# startup diagnostics: the steps performed by `when start` are run one after
+# the other, each timed as a phase, in a child interpreter launched with the
+# `-X importtime` option, so that the time spent importing every module can
+# be attributed to the phase that caused the import; the child writes a
+# marker line to stderr when a phase begins (where the import times are also
+# written by the interpreter, in order) and the phase timings as JSON to
+# stdout when finished. The parent collects both, prints a sorted report and
+# optionally saves everything to a JSON file, so that startup times can be
+# compared between releases. The steps that would modify the environment of
+# a running instance (such as cleaning up the temporary directory) are not
+# performed, and neither is the scheduler launched.
+
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+
+from importlib import import_module
+
+from lib.i18n.strings import *
+
+from ..utility import (
+    retrieve_whenever_options,
+    check_whenever_version,
+    is_whenever_running,
+    get_tkroot,
+    get_UI_theme,
+    get_rich_console,
+    write_error,
+    write_warning,
+)
+from ..startup import Startup
+from ..repocfg import AppConfig
+
+
+# prefixes of the lines exchanged between child and parent
+_PHASE_MARKER = "diag-startup-phase:"
+_RESULT_MARKER = "diag-startup-result:"
+_IMPORT_MARKER = "import time:"
+
+# phase that collects the imports performed before the first actual phase
+_LAUNCHER_PHASE = "(launcher)"
+
+# seconds to wait for the child to finish
+_DIAG_TIMEOUT = 120
+
+
+# the phases: name and function, in the same order as in `when start`, and
+# then the extra modules one by one, which are imported by `when start` only
+# when the manifest is rebuilt (and may probe the system, for instance DBus)
+def _phases(features) -> list:
+    def theme():
+        import ttkbootstrap as ttk
+
+        ttk.Style().theme_use(get_UI_theme())
+
+    def manifest():
+        from ..extra import get_manifest
+
+        get_manifest()
+
+    def extra_import(name):
+        return lambda: import_module("lib.extra.%s" % name)
+
+    from ..extra import module_names
+
+    result = [
+        ("options", retrieve_whenever_options),
+        ("version", check_whenever_version),
+        ("check running", is_whenever_running),
+        ("features", features),
+        ("tk root", get_tkroot),
+        ("theme", theme),
+        ("tray backend", lambda: import_module("lib.trayapp")),
+        ("extras manifest", manifest),
+        ("item registry", lambda: import_module("lib.items.item")),
+    ]
+    for name in module_names():
+        result.append(("extra: %s" % name, extra_import(name)))
+    return result
+
+
+# run all phases in the current process and return their timings: an error
+# in a phase is recorded instead of interrupting the sequence, and phases
+# that need the Tk root are skipped when it could not be created (as in the
+# case of a missing display)
+def run_phases(features, markers: bool = False) -> list[dict]:
+    startup = Startup(workers=1)
+    errors = {}
+    gui_phases = ["theme", "tray backend"]
+    for name, function in _phases(features):
+        if name in gui_phases and "tk root" in errors:
+            errors[name] = CLI_MSG_DIAG_SKIPPED
+            continue
+        if markers:
+            sys.stderr.write("%s %s\n" % (_PHASE_MARKER, name))
+            sys.stderr.flush()
+        with startup.phase(name):
+            try:
+                function()
+            except (Exception, SystemExit) as e:
+                errors[name] = str(e) or e.__class__.__name__
+    startup.shutdown()
+    result = []
+    for t in startup.timings():
+        result.append(
+            {
+                "name": t.name,
+                "elapsed": t.elapsed * 1000,
+                "error": errors.get(t.name),
+            }
+        )
+    for name in errors:
+        if not any(x["name"] == name for x in result):
+            result.append({"name": name, "elapsed": 0.0, "error": errors[name]})
+    return result
+
+
+# entry point for the child: the result is written as a single line, so that
+# anything else printed on stdout can be safely ignored
+def run_child(features):
+    started = time.time()
+    phases = run_phases(features, markers=True)
+    sys.stdout.write(
+        "%s %s\n" % (_RESULT_MARKER, json.dumps({"started": started, "phases": phases}))
+    )
+    sys.stdout.flush()
+
+
+# parse the output of `-X importtime`, attributing each import to the phase
+# that was running when it was performed: times are converted to ms
+def _parse_imports(stderr: str) -> tuple[list[dict], list[str]]:
+    imports = []
+    other = []
+    phase = _LAUNCHER_PHASE
+    for line in stderr.splitlines():
+        if line.startswith(_PHASE_MARKER):
+            phase = line[len(_PHASE_MARKER) :].strip()
+        elif line.startswith(_IMPORT_MARKER) and "|" in line:
+            try:
+                self_us, cumulative_us, name = line[len(_IMPORT_MARKER) :].split("|")
+                imports.append(
+                    {
+                        "module": name.strip(),
+                        "self": int(self_us) / 1000,
+                        "cumulative": int(cumulative_us) / 1000,
+                        "level": (len(name) - len(name.lstrip()) - 1) // 2,
+                        "phase": phase,
+                    }
+                )
+            except ValueError:
+                pass
+        elif line.strip():
+            other.append(line)
+    return imports, other
+
+
+# run the child interpreter and collect its results
+def _run_profiled(script: str, appdata: str, whenever: str) -> dict | None:
+    cmd = [
+        sys.executable,
+        "-X",
+        "importtime",
+        script,
+        "diag",
+        "startup",
+        "--child",
+        "-D",
+        appdata,
+        "-W",
+        whenever,
+    ]
+    spawned = time.time()
+    try:
+        proc = subprocess.run(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            timeout=_DIAG_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        write_error(CLI_ERR_DIAG_FAILED % e)
+        return None
+    wall = (time.time() - spawned) * 1000
+    stderr = proc.stderr.decode(errors="replace")
+    child = None
+    for line in proc.stdout.decode(errors="replace").splitlines():
+        if line.startswith(_RESULT_MARKER):
+            try:
+                child = json.loads(line[len(_RESULT_MARKER) :])
+            except ValueError:
+                pass
+    imports, other = _parse_imports(stderr)
+    if child is None:
+        write_error(CLI_ERR_DIAG_FAILED % ("\n".join(other) or proc.returncode))
+        return None
+    return {
+        "wall": wall,
+        "launch": (child["started"] - spawned) * 1000,
+        "phases": child["phases"],
+        "imports": imports,
+    }
+
+
+# run the phases in this process, when a child interpreter cannot be used
+# (that is, in frozen distributions): import times are not available
+def _run_inprocess(features) -> dict:
+    start = time.time()
+    phases = run_phases(features)
+    return {
+        "wall": (time.time() - start) * 1000,
+        "launch": None,
+        "phases": phases,
+        "imports": [],
+    }
+
+
+# print the report: phases sorted by duration along with the time spent in
+# the imports that they caused, then the slowest imports
+def _print_report(data: dict, top: int):
+    console = get_rich_console()
+    import_times = {}
+    for x in data["imports"]:
+        if x["level"] == 0:
+            import_times[x["phase"]] = import_times.get(x["phase"], 0) + x["cumulative"]
+    console.print(CLI_MSG_DIAG_PHASES, highlight=False)
+    if data["launch"] is not None:
+        console.print(
+            "  %9.1f ms   %9.1f ms   %s"
+            % (data["launch"], import_times.get(_LAUNCHER_PHASE, 0), _LAUNCHER_PHASE),
+            highlight=False,
+        )
+    for x in sorted(data["phases"], key=lambda x: x["elapsed"], reverse=True):
+        line = "  %9.1f ms   %9.1f ms   %s" % (
+            x["elapsed"],
+            import_times.get(x["name"], 0),
+            x["name"],
+        )
+        if x["error"]:
+            line += " [dim](%s)[/]" % x["error"].replace("[", "\\[")
+        console.print(line, highlight=False)
+    if data["imports"]:
+        console.print(CLI_MSG_DIAG_IMPORTS % top, highlight=False)
+        slowest = sorted(data["imports"], key=lambda x: x["cumulative"], reverse=True)
+        for x in slowest[:top]:
+            console.print(
+                "  %9.1f ms   %9.1f ms   %s [dim](%s)[/]"
+                % (x["cumulative"], x["self"], x["module"], x["phase"]),
+                highlight=False,
+            )
+    console.print(CLI_MSG_DIAG_TOTAL % data["wall"], highlight=False)
+
+
+# perform the diagnostics, print the report and possibly save it to a file:
+# `script` is the launcher to be run by the child interpreter, `features` the
+# function that activates or deactivates features according to availability
+def diag_startup(
+    script: str,
+    features,
+    json_file: str | None = None,
+    top: int = 20,
+) -> bool:
+    appdata: str = AppConfig.get("APPDATA")  # type: ignore
+    whenever: str = AppConfig.get("WHENEVER")  # type: ignore
+    if getattr(sys, "frozen", False):
+        write_warning(CLI_MSG_DIAG_NO_IMPORTTIME)
+        data = _run_inprocess(features)
+    else:
+        data = _run_profiled(script, appdata, whenever)
+        if data is None:
+            return False
+    data["version"] = UI_APP_VERSION
+    data["python"] = platform.python_version()
+    data["platform"] = sys.platform
+    data["time"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    _print_report(data, top)
+    if json_file:
+        try:
+            with open(json_file, "w") as f:
+                json.dump(data, f, indent=1)
+        except OSError as e:
+            write_error(CLI_ERR_DIAG_CANNOT_WRITE % (json_file, e))
+            return False
+    return True
+
+
+# end.
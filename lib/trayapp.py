@@ -5,7 +5,9 @@ from lib.i18n.strings import *
 import pystray
 import threading
 
-from .utility import get_image
+from time import perf_counter
+
+from .utility import get_image, get_cached_image
 from .platform import is_windows, is_linux, is_mac
 
 from .icons import CLOCK_ICON48 as CLOCK_ICON
@@ -15,10 +17,110 @@ from .icons import CLOCK_ICON_BUSY48 as CLOCK_ICON_BUSY
 from .repocfg import AppConfig
 
 
-# icons
-_tray_icon = get_image(CLOCK_ICON)
-_tray_icon_gray = get_image(CLOCK_ICON_GRAY)
-_tray_icon_busy = get_image(CLOCK_ICON_BUSY)
+# minimum time (in milliseconds) that the busy icon stays displayed, and
+# time that the scheduler must have been busy before the busy icon is shown:
+# short bursts of activity then do not cause a series of icon redraws
+_TRAY_ICON_MIN_DWELL_MS: int = AppConfig.get("TRAY_ICON_MIN_DWELL_MS", 1000)  # type: ignore
+_TRAY_ICON_BUSY_DELAY_MS: int = AppConfig.get("TRAY_ICON_BUSY_DELAY_MS", 300)  # type: ignore
+
+
+# states of the tray icon
+ICON_NORMAL = "normal"
+ICON_BUSY = "busy"
+ICON_PAUSED = "paused"
+
+
+# icon variants, rendered once in the format that the tray backends use, so
+# that changing the icon does not also require to decode or convert images
+def _tray_icon_variants() -> dict:
+    sources = {
+        ICON_NORMAL: CLOCK_ICON,
+        ICON_BUSY: CLOCK_ICON_BUSY,
+        ICON_PAUSED: CLOCK_ICON_GRAY,
+    }
+    return dict(
+        (
+            state,
+            get_cached_image(
+                ("tray", state), lambda data=data: get_image(data).convert("RGBA")
+            ),
+        )
+        for state, data in sources.items()
+    )
+
+
+# the state of the tray icon, which is paused, busy, or normal (in order of
+# priority): pausing and resuming are shown immediately, since they follow a
+# request from the user, while the busy state is only shown after it lasted
+# for a while, and then for a minimum amount of time; timers are handled by
+# the main loop, thus all methods must be called in the main thread
+class TrayIconState(object):
+
+    def __init__(
+        self,
+        widget,
+        icon,
+        dwell: int = _TRAY_ICON_MIN_DWELL_MS,
+        delay: int = _TRAY_ICON_BUSY_DELAY_MS,
+    ):
+        self._widget = widget
+        self._icon = icon
+        self._dwell = dwell
+        self._delay = delay
+        self._variants = _tray_icon_variants()
+        self._busy = False
+        self._paused = False
+        self._shown = ICON_NORMAL
+        self._shown_at = perf_counter()
+        self._timer = None
+        self.changes = 0
+
+    def set_busy(self, busy: bool):
+        self._busy = busy
+        self._update()
+
+    def set_paused(self, paused: bool):
+        self._paused = paused
+        self._update()
+
+    def _wanted(self) -> str:
+        if self._paused:
+            return ICON_PAUSED
+        elif self._busy:
+            return ICON_BUSY
+        else:
+            return ICON_NORMAL
+
+    def _update(self):
+        if self._timer is not None:
+            self._widget.after_cancel(self._timer)
+            self._timer = None
+        wanted = self._wanted()
+        if wanted == self._shown:
+            return
+        if ICON_PAUSED in (wanted, self._shown):
+            self._show(wanted)
+        elif wanted == ICON_BUSY:
+            self._timer = self._widget.after(self._delay, self._expired)
+        else:
+            shown_for = int((perf_counter() - self._shown_at) * 1000)
+            if shown_for >= self._dwell:
+                self._show(wanted)
+            else:
+                self._timer = self._widget.after(
+                    self._dwell - shown_for, self._expired
+                )
+
+    def _expired(self):
+        self._timer = None
+        self._show(self._wanted())
+
+    def _show(self, state: str):
+        if state != self._shown:
+            self._icon.icon = self._variants[state]
+            self._shown = state
+            self._shown_at = perf_counter()
+            self.changes += 1
 
 
 # menu reactions: all events are managed by the main application, and
@@ -57,20 +159,6 @@ def on_exit(root):
     root.send_exit()
 
 
-# set icon color to gray/color: these functions are called by the main
-# application to change the icon status when pausing/resuming the scheduler
-def set_tray_icon_gray(icon):
-    icon.icon = _tray_icon_gray
-
-
-def set_tray_icon_normal(icon):
-    icon.icon = _tray_icon
-
-
-def set_tray_icon_busy(icon):
-    icon.icon = _tray_icon_busy
-
-
 # entry point for the tray resident application
 def main(root):
     # create the menu: this menu is OK for Windows and for Linux environments
@@ -146,7 +234,7 @@ def main(root):
     # create the icon
     tray = pystray.Icon(
         UI_APP,
-        _tray_icon,
+        _tray_icon_variants()[ICON_NORMAL],
         UI_APP_LABEL,
         menu=menu,
     )
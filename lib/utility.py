@@ -2,12 +2,12 @@
 
 import sys
 import os
+import json
+import atexit
 import shutil
 import subprocess
-from base64 import b64decode
 import re
 
-from PIL.ImageFile import ImageFile
 from tomlkit import (
     inline_table,
     array,
@@ -18,20 +18,26 @@ from tomlkit import (
 from hashlib import blake2s
 from base64 import decodebytes as b64_decodeb
 from io import BytesIO
-from PIL import Image, ImageTk
 from time import time
-
-import tkinter as tk
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Callable
 
 from rich.console import Console
 
-import darkdetect
 from semver import Version
 
+# PIL and tkinter are only imported when images or windows are actually
+# built, so that commands that do not show any window do not pay for them at
+# startup, and can also run where no GUI toolkit is installed
+if TYPE_CHECKING:
+    from PIL.Image import Image
+    from PIL import ImageTk
+    import tkinter as tk
+
 from .i18n.strings import *
 from .repocfg import AppConfig
 from .runner.logger import Logger
-from .platform import is_windows, is_linux, is_mac
+from .platform import is_windows, is_linux, is_mac, get_resident_memory
 from .lua import lua_library_path
 
 
@@ -70,8 +76,17 @@ _LUA_INIT_NAME = "init.lua"
 # _LUAROCKS_INIT_NAME = "rocks.lua"
 
 
-# the common Tk root
-_tkroot = tk.Tk()
+# the common Tk root: it is only created when first requested, so that the
+# commands that do not show any window neither pay for the creation of a Tk
+# interpreter nor need a display to be available
+_tkroot = None
+
+# caches of decoded images (see `get_cached_image`) and of the UI images
+# built from them (see `get_cached_ui_image`), keyed by tuples that begin
+# with the kind of image and contain everything the image depends on
+_image_cache = {}
+_image_cache_mutex = Lock()
+_ui_image_cache = {}
 
 # consoles for stdio and stderr
 _console = Console(force_terminal=True)
@@ -107,11 +122,25 @@ def is_dbus_operator(s: str) -> bool:
     return s in _DBUS_PARAM_CHECK_OPERATORS
 
 
-# return the current Tk root: create one if not already present
-def get_tkroot() -> tk.Tk:
+# return the current Tk root: create one if not already present; the images
+# that belong to the root are dropped from the cache when it is destroyed
+def get_tkroot() -> "tk.Tk":
+    global _tkroot
+    if _tkroot is None:
+        import tkinter as tk
+
+        _tkroot = tk.Tk()
+        _tkroot.bind("<Destroy>", _tkroot_destroyed, add="+")
     return _tkroot
 
 
+def _tkroot_destroyed(event):
+    global _tkroot
+    if event.widget is _tkroot:
+        _tkroot = None
+        evict_ui_images()
+
+
 # return the terminal console handled by the "rich" module
 def get_rich_console() -> Console:
     return _console
@@ -184,26 +213,85 @@ def generate_item_name(o=None) -> str:
     return "%s_%s" % (base, generate_item_name_suffix())
 
 
-# get an image from a stored icon
-def get_image(data: bytes) -> ImageFile:
-    bio = BytesIO(b64_decodeb(data))
-    bio.seek(0)
-    return Image.open(bio)
+# return a cached decoded image, building it on first request: the images
+# are shared by all threads, and are kept until the application exits
+def get_cached_image(key: tuple, build: Callable[[], "Image"]) -> "Image":
+    with _image_cache_mutex:
+        image = _image_cache.get(key)
+    if image is None:
+        image = build()
+        with _image_cache_mutex:
+            image = _image_cache.setdefault(key, image)
+    return image
+
+
+# return a cached UI image, building it on first request: UI images belong
+# to the Tk root and are only used in the main thread, so that no locking is
+# needed; they are dropped from the cache when the Tk root is destroyed
+def get_cached_ui_image(
+    key: tuple, build: Callable[[], "ImageTk.PhotoImage"]
+) -> "ImageTk.PhotoImage":
+    image = _ui_image_cache.get(key)
+    if image is None:
+        image = _ui_image_cache[key] = build()
+    return image
+
+
+# drop all UI images, which are unusable once their Tk root is destroyed
+def evict_ui_images():
+    _ui_image_cache.clear()
+
+
+# get an image from a stored icon: the returned image is shared, and should
+# not be modified in place
+def get_image(data: bytes) -> "Image":
+    def build():
+        from PIL import Image
+
+        bio = BytesIO(b64_decodeb(data))
+        bio.seek(0)
+        image = Image.open(bio)
+        image.load()
+        return image
+
+    return get_cached_image(("image", data), build)
+
+
+# get a resized version of a stored icon
+def _get_resized_image(data: bytes, size: int) -> "Image":
+    return get_cached_image(
+        ("image", data, size), lambda: get_image(data).resize((size, size))
+    )
 
 
 # get an UI suitable image
-def get_ui_image(data: bytes) -> ImageTk.PhotoImage:
-    return ImageTk.PhotoImage(get_image(data))
+def get_ui_image(data: bytes) -> "ImageTk.PhotoImage":
+    def build():
+        from PIL import ImageTk
+
+        return ImageTk.PhotoImage(get_image(data))
+
+    return get_cached_ui_image(("image", data), build)
 
 
 # convert an image in string format to a resized tkinter-compatible PhotoImage:
 # this must be used **after** a Tk root has been created
-def get_icon(image: bytes) -> ImageTk.PhotoImage:
-    return ImageTk.PhotoImage(Image.open(BytesIO(b64decode(image))).resize((24, 24)))
+def get_icon(image: bytes) -> "ImageTk.PhotoImage":
+    def build():
+        from PIL import ImageTk
+
+        return ImageTk.PhotoImage(_get_resized_image(image, 24))
+
+    return get_cached_ui_image(("image", image, 24), build)
+
 
+def get_appicon(image: bytes) -> "ImageTk.PhotoImage":
+    def build():
+        from PIL import ImageTk
 
-def get_appicon(image: bytes) -> ImageTk.PhotoImage:
-    return ImageTk.PhotoImage(Image.open(BytesIO(b64decode(image))).resize((32, 32)))
+        return ImageTk.PhotoImage(_get_resized_image(image, 32))
+
+    return get_cached_ui_image(("image", image, 32), build)
 
 
 # determine where configuration is stored by default
@@ -389,27 +477,136 @@ def save_script(fname, text):
         os.chmod(dest, 0o700)
 
 
+# cache of the results of probing the `whenever` binary (`--version` and
+# `--options`): results are saved in the application data directory along
+# with the identity of the binary, that is, its path, size, modification
+# time and content hash, so that on following starts they only cost a call
+# to `stat`; the binary is only hashed when its size or modification time
+# changed, and probes are repeated when its contents changed as well; as
+# probes might run concurrently at startup, the cache is protected by a lock
+_whenever_probes = None
+_whenever_probes_mutex = Lock()
+
+
+# return the path of the probe cache file
+def get_whenever_probes_file() -> str:
+    s: str = AppConfig.get("CFGNAME")  # type: ignore
+    d: str = AppConfig.get("APPDATA")  # type: ignore
+    basename = "%s_probes.json" % s.lower()
+    return os.path.join(d, basename)
+
+
+def _hash_file(path: str) -> str:
+    h = blake2s()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# load the cached probe results for the binary at `path`, discarding them if
+# the binary has changed: the cache entry is returned in any case, and the
+# probe results are reset if they are no longer valid
+def _load_whenever_probes(path: str) -> dict:
+    global _whenever_probes
+    with _whenever_probes_mutex:
+        if _whenever_probes is not None and _whenever_probes["path"] == path:
+            return _whenever_probes
+        entry = {"path": path, "size": None, "mtime": None, "hash": None, "probes": {}}
+        try:
+            st = os.stat(path)
+        except OSError:
+            return entry
+        try:
+            with open(get_whenever_probes_file()) as f:
+                cached = json.load(f).get(path)
+            if isinstance(cached.get("probes"), dict):
+                entry = cached
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+        if entry.get("size") != st.st_size or entry.get("mtime") != st.st_mtime_ns:
+            digest = _hash_file(path)
+            if digest != entry.get("hash"):
+                entry["probes"] = {}
+            entry.update(size=st.st_size, mtime=st.st_mtime_ns, hash=digest)
+            _save_whenever_probes(entry)
+        _whenever_probes = entry
+        return entry
+
+
+# save a cache entry: the lock must be held by the caller
+def _save_whenever_probes(entry: dict):
+    try:
+        fn = get_whenever_probes_file()
+        try:
+            with open(fn) as f:
+                cache = json.load(f)
+            if not isinstance(cache, dict):
+                cache = {}
+        except (OSError, ValueError):
+            cache = {}
+        cache[entry["path"]] = entry
+        with open(fn + ".tmp", "w") as f:
+            json.dump(cache, f, indent=1)
+        os.replace(fn + ".tmp", fn)
+    except (OSError, TypeError):
+        pass
+
+
+# forget the cached probe results, for instance after replacing the binary
+def invalidate_whenever_probes():
+    global _whenever_probes, _current_whenever_version
+    with _whenever_probes_mutex:
+        _whenever_probes = None
+        _current_whenever_version = None
+        try:
+            os.remove(get_whenever_probes_file())
+        except (OSError, TypeError):
+            pass
+
+
+# run `whenever` with the given option and return a tuple consisting of the
+# return code and the output, or None if it could not be run: results are
+# taken from the cache whenever possible
+def _probe_whenever(option: str) -> tuple[int, str] | None:
+    whenever_path: str = AppConfig.get("WHENEVER")  # type: ignore
+    try:
+        path = os.path.abspath(whenever_path)
+    except TypeError:
+        return None
+    entry = _load_whenever_probes(path)
+    with _whenever_probes_mutex:
+        cached = entry["probes"].get(option)
+    if cached is not None:
+        return cached[0], cached[1]
+    try:
+        result = subprocess.run(
+            [whenever_path, option],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            text=True,
+            creationflags=(
+                subprocess.CREATE_NO_WINDOW if is_windows() else 0  # type: ignore
+            ),
+        )
+    except Exception:
+        return None
+    if entry["hash"] is not None:
+        with _whenever_probes_mutex:
+            entry["probes"][option] = [result.returncode, result.stdout]
+            _save_whenever_probes(entry)
+    return result.returncode, result.stdout
+
+
 # return the output of `whenever --version`
 def get_whenever_version() -> None | str:
     global _current_whenever_version
-    whenever_path: str = AppConfig.get("WHENEVER")  # type: ignore
     if _current_whenever_version is None:
-        try:
-            result = subprocess.run(
-                [whenever_path, "--version"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-                text=True,
-                creationflags=(
-                    subprocess.CREATE_NO_WINDOW if is_windows() else 0  # type: ignore
-                ),
-            )
-            if result:
-                _current_whenever_version = result.stdout.strip()
-            else:
-                _current_whenever_version = None
-        except Exception:
+        result = _probe_whenever("--version")
+        if result:
+            _current_whenever_version = result[1].strip()
+        else:
             _current_whenever_version = None
     return _current_whenever_version
 
@@ -432,52 +629,37 @@ def retrieve_whenever_options():
     # ...other options might appear above here
 
     # then ask the executable for options
-    whenever_path: str = AppConfig.get("WHENEVER")  # type: ignore
-    try:
-        result = subprocess.run(
-            [whenever_path, "--options"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-            text=True,
-            creationflags=(
-                subprocess.CREATE_NO_WINDOW if is_windows() else 0  # type: ignore
-            ),
-        )
-        if result:
-            # output has the form: `options: <opt1> <opt2> ..`, each one might
-            # or might not be present in the output, so we check whether the
-            # list below contains or not one of them
-            if result.returncode == 0:
-                opts = result.stdout.strip().split()
-                if opts[0] != "options:":
-                    # maybe it is not the `whenever` we are looking for?
-                    return
-                opts = opts[1:]
-                if "dbus" in opts:
-                    AppConfig.delete("WHENEVER_HAS_DBUS")
-                    AppConfig.set("WHENEVER_HAS_DBUS", True)
-                if sys.platform.startswith("win") and "wmi" in opts:
-                    AppConfig.delete("WHENEVER_HAS_WMI")
-                    AppConfig.set("WHENEVER_HAS_WMI", True)
-                if "lua_sync" in opts:
-                    AppConfig.delete("WHENEVER_HAS_LUASYNC")
-                    AppConfig.set("WHENEVER_HAS_LUASYNC", True)
-                if "lua_httpreq" in opts:
-                    AppConfig.delete("WHENEVER_HAS_LUAHTTPREQ")
-                    AppConfig.set("WHENEVER_HAS_LUAHTTPREQ", True)
-                # ...other options might appear
-            else:
-                # this might be an older version, assume DBus is available
-                AppConfig.delete("WHENEVER_HAS_DBUS")
-                AppConfig.set("WHENEVER_HAS_DBUS", True)
-        else:
-            # this too might be an older version, assume DBus is available
-            AppConfig.delete("WHENEVER_HAS_DBUS")
-            AppConfig.set("WHENEVER_HAS_DBUS", True)
-    except Exception:
+    result = _probe_whenever("--options")
+    if result is None:
         # maybe no executable has been found? Still, no available option.
         return
+    returncode, output = result
+    # output has the form: `options: <opt1> <opt2> ..`, each one might
+    # or might not be present in the output, so we check whether the
+    # list below contains or not one of them
+    if returncode == 0:
+        opts = output.strip().split()
+        if not opts or opts[0] != "options:":
+            # maybe it is not the `whenever` we are looking for?
+            return
+        opts = opts[1:]
+        if "dbus" in opts:
+            AppConfig.delete("WHENEVER_HAS_DBUS")
+            AppConfig.set("WHENEVER_HAS_DBUS", True)
+        if sys.platform.startswith("win") and "wmi" in opts:
+            AppConfig.delete("WHENEVER_HAS_WMI")
+            AppConfig.set("WHENEVER_HAS_WMI", True)
+        if "lua_sync" in opts:
+            AppConfig.delete("WHENEVER_HAS_LUASYNC")
+            AppConfig.set("WHENEVER_HAS_LUASYNC", True)
+        if "lua_httpreq" in opts:
+            AppConfig.delete("WHENEVER_HAS_LUAHTTPREQ")
+            AppConfig.set("WHENEVER_HAS_LUAHTTPREQ", True)
+        # ...other options might appear
+    else:
+        # this might be an older version, assume DBus is available
+        AppConfig.delete("WHENEVER_HAS_DBUS")
+        AppConfig.set("WHENEVER_HAS_DBUS", True)
 
 
 # check whether the scheduler is running
@@ -536,12 +718,108 @@ def get_logfile() -> str:
     return os.path.join(d, basename)
 
 
+# return the path of the control socket of a running instance
+def get_control_socket_file() -> str:
+    s: str = AppConfig.get("CFGNAME")  # type: ignore
+    d: str = AppConfig.get("APPDATA")  # type: ignore
+    basename = "%s_control.sock" % s.lower()
+    return os.path.join(d, basename)
+
+
+# return the task history database path
+def get_history_dbfile() -> str:
+    s: str = AppConfig.get("CFGNAME")  # type: ignore
+    d: str = AppConfig.get("APPDATA")  # type: ignore
+    basename = "%s_history.db" % s.lower()
+    return os.path.join(d, basename)
+
+
+# return the path of the extra items manifest
+def get_extras_manifest_file() -> str:
+    s: str = AppConfig.get("CFGNAME")  # type: ignore
+    d: str = AppConfig.get("APPDATA")  # type: ignore
+    basename = "%s_extras.json" % s.lower()
+    return os.path.join(d, basename)
+
+
+# the system theme (dark or light): detecting it may require to spawn a
+# process, thus it is only detected once and then kept up to date by a
+# listener thread, that is notified by the desktop when the theme changes
+_system_dark = None
+_system_dark_mutex = Lock()
+_theme_listener = None
+_theme_monitor = None
+
+
+def _detect_system_dark() -> bool:
+    global _system_dark
+    import darkdetect
+
+    dark = bool(darkdetect.isDark())
+    with _system_dark_mutex:
+        _system_dark = dark
+    return dark
+
+
+# on Linux the settings are monitored directly, so that the monitor process
+# can be stopped when exiting, and the theme is detected again whenever one
+# of the keys that determine it changes; elsewhere the notifications of the
+# `darkdetect` listener are used
+def _listen_theme_changes():
+    global _theme_monitor
+    try:
+        if is_linux():
+            _theme_monitor = subprocess.Popen(
+                ["gsettings", "monitor", "org.gnome.desktop.interface"],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+            assert _theme_monitor.stdout is not None
+            for line in _theme_monitor.stdout:
+                if line.startswith(("gtk-theme:", "color-scheme:")):
+                    _detect_system_dark()
+        else:
+            import darkdetect
+
+            darkdetect.listener(lambda _: _detect_system_dark())
+    except Exception:
+        # no notifications: the theme detected at first request is kept
+        pass
+
+
+def _stop_theme_listener():
+    if _theme_monitor is not None and _theme_monitor.poll() is None:
+        _theme_monitor.terminate()
+
+
+# return whether the system uses a dark theme, starting the listener thread
+# on first request
+def is_system_dark() -> bool:
+    global _theme_listener
+    with _system_dark_mutex:
+        dark = _system_dark
+    if dark is None:
+        dark = _detect_system_dark()
+        with _system_dark_mutex:
+            start = _theme_listener is None
+            if start:
+                _theme_listener = Thread(
+                    target=_listen_theme_changes, name="theme listener", daemon=True
+                )
+        if start:
+            atexit.register(_stop_theme_listener)
+            _theme_listener.start()  # type: ignore
+    return dark
+
+
 # get the GUI theme according to system theme or DEBUG mode
 def get_UI_theme():
     if AppConfig.get("DEBUG"):
         return AppConfig.get("DEFAULT_THEME_DEBUG")
     else:
-        if darkdetect.isDark():
+        if is_system_dark():
             return AppConfig.get("DEFAULT_THEME_DARK")
         else:
             return AppConfig.get("DEFAULT_THEME_LIGHT")
@@ -552,7 +830,7 @@ def get_editor_theme():
     if AppConfig.get("DEBUG"):
         return AppConfig.get("EDITOR_THEME_DEBUG")
     else:
-        if darkdetect.isDark():
+        if is_system_dark():
             return AppConfig.get("EDITOR_THEME_DARK")
         else:
             return AppConfig.get("EDITOR_THEME_LIGHT")
@@ -684,10 +962,31 @@ def clean_caption(s) -> str:
     return s
 
 
-# initialize the logger
+# initialize the logger: pending records are written in any case on exit
 def init_logger(filename, level, app=None):
     global _logger
     _logger = Logger(filename, level, app)
+    atexit.register(_logger.close)
+
+
+# log the resident memory of the process, so that the footprints of the
+# resident commands can be compared
+def log_resident_memory(when: str):
+    rss = get_resident_memory()
+    if rss is not None:
+        log = get_logger().context().use(emitter="FRONTEND")
+        log.use(
+            level=log.LEVEL_INFO,
+            when=log.WHEN_PROC,
+            action="memory",
+            status=log.STATUS_MSG,
+        ).log("resident memory (%s): %.1fMiB" % (when, rss / 1048576))
+
+
+# write all pending records and close the logger, if it has been initialized
+def close_logger():
+    if _logger is not None:
+        _logger.close()
 
 
 # ...
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+#
+# This small utility measures the startup time of the non-GUI subcommands,
+# running them with no display available (`DISPLAY` and `WAYLAND_DISPLAY`
+# are removed from the environment) so that it also verifies that they can
+# run headless. To use it, just launch
+#
+# $ python support/bench_startup.py [-n RUNS] [--importtime] [COMMAND ...]
+#
+# from the project base directory, where each COMMAND is a quoted list of
+# arguments for `when` (default: "version" and "tool --check-config"). When
+# `--importtime` is specified, the modules that take longest to import are
+# also listed for each command, as reported by `python -X importtime`.
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import statistics
+
+
+WHEN_SCRIPT = os.path.join("when", "when.py")
+DEFAULT_COMMANDS = ["version", "tool --check-config"]
+TOP_IMPORTS = 15
+
+
+# verbose output shortcut
+def oerr(s, verbose=True):
+    if verbose:
+        sys.stderr.write("bench_startup: %s\n" % s)
+
+
+# environment without any display
+def headless_env():
+    env = dict(os.environ)
+    env.pop("DISPLAY", None)
+    env.pop("WAYLAND_DISPLAY", None)
+    return env
+
+
+# run a command once, returning wall clock time, exit code and stderr
+def run_once(args, extra=None):
+    cmd = [sys.executable] + (extra or []) + [WHEN_SCRIPT] + args
+    start = time.perf_counter()
+    proc = subprocess.run(
+        cmd,
+        env=headless_env(),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, proc.returncode, proc.stderr.decode(errors="replace")
+
+
+# the slowest imports, by cumulative time, from `-X importtime` output
+def slowest_imports(stderr, count=TOP_IMPORTS):
+    result = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            try:
+                _, cumulative, name = line[len("import time:") :].split("|")
+                result.append((int(cumulative), name.rstrip()))
+            except ValueError:
+                pass
+    result.sort(reverse=True)
+    return result[:count]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="measure `when` startup time")
+    parser.add_argument("-n", "--runs", type=int, default=10)
+    parser.add_argument("--importtime", action="store_true")
+    parser.add_argument("commands", nargs="*", default=DEFAULT_COMMANDS)
+    args = parser.parse_args()
+    if not os.path.exists(WHEN_SCRIPT):
+        oerr("must be launched from the project base directory")
+        sys.exit(1)
+    failed = False
+    for command in args.commands:
+        cmdargs = command.split()
+        times = []
+        for _ in range(args.runs):
+            elapsed, rc, stderr = run_once(cmdargs)
+            if rc != 0:
+                oerr("`when %s` failed without display (exit code %s)" % (command, rc))
+                oerr(stderr.strip())
+                failed = True
+                break
+            times.append(elapsed)
+        if times:
+            print(
+                "when %-24s min %7.1f ms   median %7.1f ms   (%s runs, headless)"
+                % (
+                    command,
+                    min(times) * 1000,
+                    statistics.median(times) * 1000,
+                    len(times),
+                )
+            )
+        if args.importtime:
+            _, _, stderr = run_once(cmdargs, ["-X", "importtime"])
+            for cumulative, name in slowest_imports(stderr):
+                print("    %9.1f ms  %s" % (cumulative / 1000, name))
+    sys.exit(1 if failed else 0)
+
+
+# end.
@@ -0,0 +1,92 @@
+# the control server handles the requests of a batch in order: a request
+# that does not wait is only performed after the commands that precede it
+# in the same batch have been acknowledged
+#
+# the wrapper is replaced by a fake one, whose commands are acknowledged a
+# little later by a separate thread, and whose history records them then
+
+import json
+import threading
+
+from concurrent.futures import Future
+
+from lib.control import ControlServer
+
+
+# seconds after which the fake scheduler acknowledges a command
+_ACK_DELAY = 0.05
+
+
+class _FakeHistory(object):
+
+    def __init__(self):
+        self.entries = []
+        self.mutex = threading.Lock()
+
+    def query(self, **_):
+        with self.mutex:
+            return list(self.entries)
+
+
+class _FakeWrapper(object):
+
+    def __init__(self):
+        self._history = _FakeHistory()
+        self.writes = []
+
+    def history(self):
+        return self._history
+
+    def submit_commands(self, commands, timeout=None):
+        self.writes.append(list(commands))
+        futures = list(Future() for _ in commands)
+
+        def acknowledge():
+            for (command, name), future in zip(commands, futures):
+                with self._history.mutex:
+                    self._history.entries.append({"task": name, "duration": None})
+                future.set_result("%s %s" % (command, name))
+
+        threading.Timer(_ACK_DELAY, acknowledge).start()
+        return futures
+
+
+def _batch(server, requests):
+    lines = list(json.dumps(x).encode("utf-8") for x in requests)
+    return list(json.loads(x) for x in server._batch(lines).splitlines())
+
+
+def test_history_after_waited_commands():
+    wrapper = _FakeWrapper()
+    server = ControlServer(wrapper, "unused")
+    requests = list(
+        {"cmd": "trigger", "name": "E%s" % n, "wait": True, "id": n}
+        for n in range(200)
+    )
+    requests.append({"cmd": "history", "id": "h"})
+    replies = _batch(server, requests)
+    assert len(wrapper.writes) == 1
+    assert all(x["ok"] for x in replies)
+    assert list(x["id"] for x in replies) == list(range(200)) + ["h"]
+    assert len(replies[-1]["result"]) == 200
+
+
+def test_commands_after_request_are_sent_later():
+    wrapper = _FakeWrapper()
+    server = ControlServer(wrapper, "unused")
+    replies = _batch(
+        server,
+        [
+            {"cmd": "trigger", "name": "A", "wait": True},
+            {"cmd": "history"},
+            {"cmd": "trigger", "name": "B", "wait": True},
+            {"cmd": "history"},
+        ],
+    )
+    assert wrapper.writes == [[("trigger", "A")], [("trigger", "B")]]
+    assert replies[0]["result"] == "trigger A"
+    assert len(replies[1]["result"]) == 1
+    assert len(replies[3]["result"]) == 2
+
+
+# end.
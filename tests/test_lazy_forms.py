@@ -0,0 +1,112 @@
+# the resident application must not import any editor form on startup: forms
+# are only imported when a window is opened for the first time
+#
+# the GUI toolkits are replaced by stubs, so that the test does not require a
+# display; the other dependencies of the launcher are needed instead
+
+import sys
+
+from unittest.mock import MagicMock
+
+import pytest
+
+
+# the GUI modules that are replaced by stubs
+_STUBBED = [
+    "pystray",
+    "ttkbootstrap",
+    "PIL",
+    "PIL.Image",
+    "PIL.ImageFile",
+    "PIL.ImageTk",
+]
+
+# the modules loaded by `when start` before the main loop runs
+_RESIDENT = [
+    "when.when",
+    "lib.trayapp",
+    "lib.control",
+    "lib.eventbridge",
+    "lib.startup",
+    "lib.runner.process",
+]
+
+
+def _forms_loaded() -> list[str]:
+    return sorted(x for x in sys.modules if x == "lib.forms" or x.startswith("lib.forms."))
+
+
+# remove the modules of the application, so that they are imported again
+def _unload_application():
+    for name in list(sys.modules):
+        if name in ("lib", "when") or name.startswith(("lib.", "when.")):
+            del sys.modules[name]
+
+
+# the modules of the application are imported from scratch, with the GUI
+# modules replaced by stubs that are removed when the test is finished;
+# other modules are left alone, as extension modules cannot be reloaded
+@pytest.fixture
+def fresh_modules(monkeypatch):
+    for name in ("tomlkit", "rich", "semver"):
+        pytest.importorskip(name)
+    _unload_application()
+    for name in _STUBBED:
+        monkeypatch.setitem(sys.modules, name, MagicMock(name=name))
+    yield
+    _unload_application()
+
+
+def test_resident_imports_no_forms(fresh_modules):
+    for name in _RESIDENT:
+        __import__(name)
+    assert _forms_loaded() == []
+
+
+def test_features_check_imports_no_forms(fresh_modules, monkeypatch):
+    import when.when as launcher
+
+    # when all features are available nothing has to be deactivated
+    for name in (
+        "whenever_has_wmi",
+        "whenever_has_dbus",
+        "whenever_has_lua_sync",
+        "whenever_has_lua_httpreq",
+    ):
+        monkeypatch.setattr(launcher, name, lambda: True)
+    launcher.check_prepare_features()
+    assert _forms_loaded() == []
+
+
+def test_missing_lua_sync_imports_no_forms(fresh_modules, monkeypatch):
+    import when.when as launcher
+
+    for name in (
+        "whenever_has_wmi",
+        "whenever_has_dbus",
+        "whenever_has_lua_httpreq",
+    ):
+        monkeypatch.setattr(launcher, name, lambda: True)
+    monkeypatch.setattr(launcher, "whenever_has_lua_sync", lambda: False)
+    launcher.check_prepare_features()
+    assert _forms_loaded() == []
+
+    from lib.internal import multi_conds_run_task as mcrt
+
+    assert mcrt.ConfluenceCondition.available is False
+
+
+# the item definitions are used without the GUI, by the configuration check;
+# the manifest of the extra items is given, as building it imports them all
+def test_item_definitions_import_no_forms(fresh_modules, monkeypatch):
+    from lib import extra
+
+    monkeypatch.setattr(extra, "_manifest", {"key": None, "items": [], "not_loaded": {}})
+    from lib.items.item import ALL_AVAILABLE_ITEMS_D, FormReference
+
+    assert _forms_loaded() == []
+    for signature in ("cond:lua:mcrt_confluence", "cond:interval:startup"):
+        assert isinstance(ALL_AVAILABLE_ITEMS_D[signature][1], FormReference)
+
+
+# end.
@@ -0,0 +1,69 @@
+# rotated log segments must be pruned oldest first, also when several of them
+# are rotated within the same second
+
+import os
+
+from datetime import datetime
+
+import pytest
+
+from lib.runner import logger
+
+
+# a clock that is stuck at the same second
+class _FixedClock(object):
+
+    @staticmethod
+    def now():
+        return datetime(2026, 10, 17, 21, 26, 7)
+
+
+@pytest.fixture
+def logdir(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger, "datetime", _FixedClock)
+    return tmp_path
+
+
+# rotate the log `count` times, compressing all segments but the last one
+def _rotate(filename: str, count: int) -> list[str]:
+    names = []
+    for n in range(count):
+        name = logger._rotated_name(filename)
+        if n < count - 1:
+            name += ".gz"
+        with open(name, "w") as f:
+            f.write("segment %s\n" % n)
+        names.append(os.path.basename(name))
+    return names
+
+
+def test_same_second_segments_are_distinct(logdir):
+    names = _rotate(str(logdir / "when.log"), 12)
+    assert len(set(x.removesuffix(".gz") for x in names)) == 12
+
+
+def test_prune_keeps_newest_segments(logdir):
+    filename = str(logdir / "when.log")
+    with open(filename, "w") as f:
+        f.write("active\n")
+    names = _rotate(filename, 12)
+    logger._prune_rotated(filename, 2)
+    assert sorted(os.listdir(logdir)) == sorted(["when.log"] + names[-2:])
+
+
+def test_prune_keeps_newest_across_seconds(logdir, monkeypatch):
+    filename = str(logdir / "when.log")
+    older = _rotate(filename, 3)
+
+    class _Later(object):
+        @staticmethod
+        def now():
+            return datetime(2026, 10, 17, 21, 26, 8)
+
+    monkeypatch.setattr(logger, "datetime", _Later)
+    newer = _rotate(filename, 1)
+    logger._prune_rotated(filename, 2)
+    assert sorted(os.listdir(logdir)) == sorted([older[-1]] + newer)
+
+
+# end.
@@ -5,11 +5,9 @@ import sys
 import os
 import os.path
 import argparse
+import json
 import gc
 
-import ttkbootstrap as ttk
-from PIL import ImageTk
-
 from typing import final
 
 
@@ -24,6 +22,7 @@ from lib.utility import (
     get_default_whenever,
     get_whenever_version,
     check_whenever_version,
+    invalidate_whenever_probes,
     get_luadir,
     get_lua_initscript,
     get_tempdir,
@@ -36,7 +35,7 @@ from lib.utility import (
     whenever_has_dbus,
     whenever_has_lua_sync,
     whenever_has_lua_httpreq,
-    get_image,
+    get_ui_image,
     get_UI_theme,
     get_tkroot,
     get_rich_console,
@@ -44,13 +43,17 @@ from lib.utility import (
     write_warning,
     init_logger,
     get_logger,
+    close_logger,
+    log_resident_memory,
+    get_control_socket_file,
+    write_error,
 )
 from lib.platform import is_windows, is_linux, is_mac
 from lib.repocfg import AppConfig
 
 from lib.runner.process import Wrapper
-
-from lib.internal import multi_conds_run_task as mcrt
+from lib.startup import Startup
+from lib.eventbridge import EventBridge
 
 
 # main root window, to be withdrawn
@@ -80,37 +83,23 @@ class App(object):
 
             myappid = "when.python.application"
             ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)  # type: ignore
+        # GUI toolkits are only loaded by the commands that show windows
+        import ttkbootstrap as ttk
+
         self._window = get_tkroot()
         self._window.withdraw()
-        self._icon = ImageTk.PhotoImage(get_image(APP_ICON))
+        self._icon = get_ui_image(APP_ICON)
         self._paused = False
         self._window.iconphoto(True, self._icon)  # type: ignore
 
-        # load forms and application related functions *after* initialization,
-        # and take property of member functions: this is done here so that all
-        # configuration that might depend on information that is acquired
-        # after startup (such as the `whenever` executable) is already known
-        # before initializations of forms and application objects
-        from lib.trayapp import (
-            set_tray_icon_gray,
-            set_tray_icon_busy,
-            set_tray_icon_normal,
-        )
-        from lib.forms.about import show_about_box
-        from lib.forms.menubox import form_MenuBox
-        from lib.forms.cfgform import form_Config
-        from lib.forms.history import form_History
-
-        self.set_tray_icon_gray = set_tray_icon_gray
-        self.set_tray_icon_busy = set_tray_icon_busy
-        self.set_tray_icon_normal = set_tray_icon_normal
-        self.show_about_box = show_about_box
-        self.form_MenuBox = form_MenuBox
-        self.form_Config = form_Config
-        self.form_History = form_History
-
         style = ttk.Style()
         style.theme_use(get_UI_theme())
+        # events sent by other threads are delivered through the bridge
+        self._bridge = EventBridge(self._window)
+        self._bridge.start()
+        # forms are only loaded when they are opened for the first time, so
+        # that the resident application does not pay for windows it may never
+        # show: see the event reactions below
         self._window.bind("<<OpenHistory>>", self.open_history)
         self._window.bind("<<OpenCfgApp>>", self.open_cfgapp)
         self._window.bind("<<OpenAboutBox>>", self.open_aboutbox)
@@ -123,9 +112,14 @@ class App(object):
         self._window.bind("<<SchedSetNotPaused>>", self.sched_icon_not_paused)
         self._window.bind("<<SchedResetConditions>>", self.sched_reset_conditions)
         self._window.bind("<<SchedReloadConfig>>", self.sched_reload_configuration)
+        self._window.bind("<<HistoryUpdated>>", self.history_updated)
+        self._window.bind("<<SchedExited>>", self.sched_exited)
         self._window.bind("<<ExitApplication>>", self.exit_app)
         self._wrapper = None
+        self._control = None
         self._trayicon = None
+        self._iconstate = None
+        self._history_form = None
         self._busy = False
 
     # the main loop is mandatory to react to events
@@ -137,31 +131,67 @@ class App(object):
     def set_wrapper(self, wrapper):
         self._wrapper = wrapper
 
-    # the tray icon if any
+    # the control endpoint if any, which must be stopped before exiting
+    def set_control(self, control):
+        self._control = control
+
+    # the tray icon if any: its image reflects the state of the scheduler;
+    # the tray application is loaded here, *after* initialization, so that
+    # all configuration that might depend on information that is acquired
+    # after startup (such as the `whenever` executable) is already known
     def set_trayicon(self, icon):
+        from lib.trayapp import TrayIconState
+
         self._trayicon = icon
+        self._iconstate = TrayIconState(self._window, icon)
 
-    # send an event to the main loop asynchronously
+    # send an event to the main loop: this can be called from any thread
     def send_event(self, event: str):
         if self._window:
-            self._window.update()
-            self._window.event_generate(event)
+            self._bridge.post(event)
 
     # shortcut to send an EXIT event
     def send_exit(self):
-        if self._window:
-            self._window.update()
-            self._window.event_generate("<<ExitApplication>>")
+        self.send_event("<<ExitApplication>>")
+
+    # log how many events have been received from other threads, how many
+    # of them have actually been delivered, and the resulting icon changes
+    def _log_event_stats(self):
+        stats = self._bridge.stats()
+        log = get_logger().context().use(emitter="FRONTEND")
+        log.use(
+            level=log.LEVEL_DEBUG,
+            when=log.WHEN_END,
+            action="events",
+            status=log.STATUS_MSG,
+        ).log(
+            "events: %s received, %s delivered, %s icon changes, "
+            "max latency %.1fms, max main loop stall %.1fms"
+            % (
+                stats["received"],
+                stats["dispatched"],
+                self._iconstate.changes if self._iconstate else 0,
+                stats["max_latency"] * 1000,
+                stats["max_stall"] * 1000,
+            )
+        )
 
     # destroy the window, stop whenever, and cleanup internals
     def destroy(self):
+        if self._window:
+            self._bridge.stop()
+        if self._control:
+            self._control.stop()
+            self._control = None
         if self._wrapper:
+            self._log_event_stats()
             self._wrapper.whenever_exit()
             self._wrapper = None
         if self._window:
             self._window.destroy()
             del self._window
             self._window = None
+        close_logger()
         if self._trayicon:
             if is_linux():
                 # something's wrong wit pystray in this case
@@ -174,11 +204,20 @@ class App(object):
     # separate, detached thread so that it does not slow down the main loop
     def open_history(self, _):
         if self._window and self._wrapper:
-            form = self.form_History(self._wrapper)
+            from lib.forms.history import form_History
+
+            form = form_History(self._wrapper)
+            # the open form receives new history entries as they arrive
+            self._history_form = form
             form.run()
+            self._history_form = None
             del form
             gc.collect()
 
+    def history_updated(self, _):
+        if self._history_form:
+            self._history_form.update_history()
+
     def sched_pause(self, _):
         if not self._paused and self._window and self._wrapper:
             log = get_logger().context().use(emitter="FRONTEND")
@@ -221,60 +260,89 @@ class App(object):
                 action="reload",
                 status=log.STATUS_MSG,
             ).log("reloading configuration")
-            self._wrapper.whenever_reload_configuration()
+            future = self._wrapper.submit_command("configure")
+            future.add_done_callback(self._reload_outcome)
+
+    # log the outcome of a configuration reload, so that a configuration that
+    # is refused by the scheduler is not silently ignored: this is called by
+    # the thread that reads the scheduler output, or by the one that handles
+    # the timeouts, and only logs
+    def _reload_outcome(self, future):
+        log = get_logger().context().use(emitter="FRONTEND", action="reload")
+        error = future.exception()
+        if error is None:
+            log.use(
+                level=log.LEVEL_INFO,
+                when=log.WHEN_PROC,
+                status=log.STATUS_OK,
+            ).log("configuration reloaded")
+        else:
+            log.use(
+                level=log.LEVEL_ERROR,
+                when=log.WHEN_PROC,
+                status=log.STATUS_ERR,
+            ).log(
+                "configuration not reloaded: %s"
+                % (str(error) or error.__class__.__name__)
+            )
 
+    # the scheduler has died on its own: its output has already been saved
+    # by the wrapper, and the application cannot do anything without it
+    def sched_exited(self, _):
+        log = get_logger().context().use(emitter="FRONTEND")
+        log.use(
+            level=log.LEVEL_ERROR,
+            when=log.WHEN_END,
+            action="shutdown",
+            status=log.STATUS_ERR,
+        ).log("the scheduler is not running anymore, exiting")
+        self.destroy()
+
+    # the icon state takes care of avoiding useless icon swaps, and of not
+    # following every short change of the busy state
     def sched_icon_busy(self, _):
-        if self._icon:
-            # check current status to avoid useless icon swaps
-            if not self._busy:
-                self._busy = True
-                if not self._paused:
-                    self.set_tray_icon_busy(self._trayicon)
+        self._busy = True
+        if self._iconstate:
+            self._iconstate.set_busy(True)
 
     def sched_icon_not_busy(self, _):
-        if self._icon:
-            # check current status to avoid useless icon swaps
-            if self._busy:
-                self._busy = False
-                if self._paused:
-                    self.set_tray_icon_gray(self._trayicon)
-                else:
-                    self.set_tray_icon_normal(self._trayicon)
+        self._busy = False
+        if self._iconstate:
+            self._iconstate.set_busy(False)
 
     def sched_icon_paused(self, _):
-        if self._icon:
-            # check current status to avoid useless icon swaps
-            if not self._paused:
-                self._paused = True
-                self.set_tray_icon_gray(self._trayicon)
+        self._paused = True
+        if self._iconstate:
+            self._iconstate.set_paused(True)
 
     def sched_icon_not_paused(self, _):
-        if self._icon:
-            # check current status to avoid useless icon swaps
-            if self._paused:
-                self._paused = False
-                if self._busy:
-                    self.set_tray_icon_busy(self._trayicon)
-                else:
-                    self.set_tray_icon_normal(self._trayicon)
+        self._paused = False
+        if self._iconstate:
+            self._iconstate.set_paused(False)
 
     def open_cfgapp(self, _):
         if self._window:
-            form = self.form_Config(self)
+            from lib.forms.cfgform import form_Config
+
+            form = form_Config(self)
             form.run()
             del form
             gc.collect()
 
     def open_menubox(self, _):
         if self._window and self._wrapper:
-            form = self.form_MenuBox(self)
+            from lib.forms.menubox import form_MenuBox
+
+            form = form_MenuBox(self)
             form.run()
             del form
             gc.collect()
 
     def open_aboutbox(self, _):
         if self._window:
-            self.show_about_box(False)
+            from lib.forms.about import show_about_box
+
+            show_about_box(False)
             gc.collect()
 
     def exit_app(self, _):
@@ -333,6 +401,9 @@ def check_prepare_features():
         # ...
     # deactivate main capabilities depending on Lua sync facilities
     if not whenever_has_lua_sync():
+        # the item module does not load its editor, which is in `forms`
+        from lib.internal import multi_conds_run_task as mcrt
+
         mcrt.ConfluenceCondition.available = False
         pass
         # ...
@@ -342,6 +413,30 @@ def check_prepare_features():
         # ...
 
 
+# exit with an error if the scheduler is already running
+def check_not_running():
+    if is_whenever_running():
+        exit_error(CLI_ERR_ALREADY_RUNNING)
+
+
+# log the timings of the startup steps, and the time needed to get to the
+# tray icon, which is the last one
+def log_startup_timings(startup):
+    log = get_logger().context().use(emitter="FRONTEND")
+    log.use(
+        level=log.LEVEL_DEBUG,
+        when=log.WHEN_START,
+        action="startup",
+        status=log.STATUS_MSG,
+    )
+    for t in startup.timings():
+        log.log(
+            "startup step `%s` (%s): started at %.1fms, took %.1fms"
+            % (t.name, t.thread, t.start * 1000, t.elapsed * 1000)
+        )
+    log.log("startup completed in %.1fms" % (startup.elapsed() * 1000))
+
+
 # subcommand main functions
 
 
@@ -389,8 +484,40 @@ def main_config(args):
             exit_error(CLI_ERR_UNEXPECTED_EXCEPTION % e)
 
 
-# start: start the scheduler in the background and display the tray icon
-def main_start(args):
+# start the control endpoint for a running scheduler, if enabled and
+# supported by the platform: a failure is logged, but is not fatal
+def start_control(wrapper):
+    if not AppConfig.get("CONTROL_SOCKET"):
+        return None
+    from lib.control import ControlServer, control_available
+
+    if not control_available():
+        return None
+    control = ControlServer(wrapper, get_control_socket_file())
+    log = get_logger().context().use(emitter="FRONTEND")
+    try:
+        if control.start():
+            return control
+        log.use(
+            level=log.LEVEL_WARNING,
+            when=log.WHEN_START,
+            action="control",
+            status=log.STATUS_FAIL,
+        ).log("control socket already in use")
+    except OSError as e:
+        log.use(
+            level=log.LEVEL_WARNING,
+            when=log.WHEN_START,
+            action="control",
+            status=log.STATUS_ERR,
+        ).log("control socket not available: %s" % e)
+    return None
+
+
+# common startup sequence of the resident commands: the Tk root is only
+# created when a GUI is needed; return the startup orchestrator, a logging
+# context, the configuration file and the scheduler executable
+def prepare_resident(args, gui: bool = True):
     # set some global configuration values according to CLI options
     AppConfig.delete("APPDATA")
     AppConfig.set("APPDATA", args.dir_appdata)
@@ -398,18 +525,29 @@ def main_start(args):
     AppConfig.set("LOGLEVEL", args.log_level.upper())
     AppConfig.delete("WHENEVER")
     AppConfig.set("WHENEVER", args.whenever)
-    # exit with an error if whenever is already running
-    if is_whenever_running():
-        exit_error(CLI_ERR_ALREADY_RUNNING)
-    # prepare application and initialize the logger
-    retrieve_whenever_options()
-    prepare_environment()
-    check_prepare_features()
-    setup_windows()
-    log_level = AppConfig.get("LOGLEVEL")
-    log_file = get_logfile()
-    config_file = get_configfile()
-    init_logger(log_file, log_level, _root)
+    # run the independent startup steps in parallel: the environment is only
+    # prepared (which also cleans up the temporary directory) when no other
+    # instance of the scheduler is running, and the features depend on the
+    # options supported by the scheduler; the Tk root is created meanwhile,
+    # because it must be created in the main thread
+    startup = Startup()
+    startup.add("check running", check_not_running)
+    startup.add("options", retrieve_whenever_options)
+    startup.add("version", check_whenever_version)
+    startup.add("environment", prepare_environment, after=["check running"])
+    # features only affect the availability of items in the editor forms,
+    # and checking them might load the forms themselves
+    if gui:
+        startup.add("features", check_prepare_features, after=["options"])
+        with startup.phase("windows"):
+            setup_windows()
+    # initialize the logger as soon as the data directory is available
+    startup.result("environment")
+    with startup.phase("logger"):
+        log_level = AppConfig.get("LOGLEVEL")
+        log_file = get_logfile()
+        config_file = get_configfile()
+        init_logger(log_file, log_level, _root)
     log = get_logger().context().use(emitter="FRONTEND")
     log.use(
         level=log.LEVEL_INFO,
@@ -417,6 +555,8 @@ def main_start(args):
         action="initializing",
         status=log.STATUS_MSG,
     ).log("starting resident %s, version %s" % (UI_APP, UI_APP_VERSION))
+    startup.wait()
+    startup.shutdown()
     whenever: str = AppConfig.get("WHENEVER")  # type: ignore
     if (
         whenever is None
@@ -427,7 +567,7 @@ def main_start(args):
             "error: `whenever` binary not found"
         )
         exit_error(CLI_ERR_WHENEVER_NOT_FOUND)
-    if not check_whenever_version():
+    if not startup.result("version"):
         v = get_whenever_version()
         log.use(
             level=log.LEVEL_INFO,
@@ -436,6 +576,12 @@ def main_start(args):
             status=log.STATUS_MSG,
         ).log(f"found `whenever` version {v}: please upgrade")
         exit_error(CLI_ERR_WHENEVER_WRONG_VERSION)
+    return startup, log, config_file, whenever
+
+
+# start: start the scheduler in the background and display the tray icon
+def main_start(args):
+    startup, log, config_file, whenever = prepare_resident(args)
     # different exception handling for DEBUG/RELEASE runs
     if DEBUG:
         # setup the scheduler and associate it to the application
@@ -452,10 +598,14 @@ def main_start(args):
                 "error: `whenever` not running"
             )
             raise Exception(CLI_ERR_STARTING_SCHEDULER)
+        _root.set_control(start_control(wrapper))  # type: ignore
         # run the tray icon application main loop
         from lib.trayapp import main
 
-        main(_root)
+        with startup.phase("tray"):
+            main(_root)
+        log_startup_timings(startup)
+        log_resident_memory("started")
         if _root is not None:
             # the following block must be normally commented out, it is
             # only used to create some forms for a screenshot
@@ -491,10 +641,14 @@ def main_start(args):
                     "error: `whenever` not running"
                 )
                 raise Exception(CLI_ERR_STARTING_SCHEDULER)
+            _root.set_control(start_control(wrapper))  # type: ignore
             # run the tray icon application main loop
             from lib.trayapp import main
 
-            main(_root)
+            with startup.phase("tray"):
+                main(_root)
+            log_startup_timings(startup)
+            log_resident_memory("started")
             if _root is not None:
                 _root.run()
         except Exception as e:
@@ -504,6 +658,92 @@ def main_start(args):
             exit_error(CLI_ERR_UNEXPECTED_EXCEPTION % e)
 
 
+# daemon: start the scheduler without any GUI and wait for signals
+def main_daemon(args):
+    startup, log, config_file, whenever = prepare_resident(args, gui=False)
+    from lib.daemon import Daemon
+
+    def run():
+        # setup the scheduler, which is not associated to any application
+        wrapper = Wrapper(config_file, whenever)
+        if not wrapper.start():
+            log.use(level=log.LEVEL_ERROR, status=log.STATUS_ERR).log(
+                "error: `whenever` not started"
+            )
+            raise Exception(CLI_ERR_STARTING_SCHEDULER)
+        control = start_control(wrapper)
+        log_startup_timings(startup)
+        stopped = Daemon(wrapper).run()
+        if control:
+            control.stop()
+        if not stopped:
+            exit_error(CLI_ERR_SCHEDULER_EXITED)
+
+    # different exception handling for DEBUG/RELEASE runs
+    if DEBUG:
+        run()
+    else:
+        try:
+            run()
+        except Exception as e:
+            log.use(level=log.LEVEL_ERROR, status=log.STATUS_ERR).log(
+                "unexpected exception: %s" % e
+            )
+            exit_error(CLI_ERR_UNEXPECTED_EXCEPTION % e)
+
+
+# ctl: send commands to a running instance through its control endpoint;
+# commands that apply to items are sent once per name, all over the same
+# connection, and names can be read from standard input
+def main_ctl(args):
+    AppConfig.delete("APPDATA")
+    AppConfig.set("APPDATA", args.dir_appdata)
+    from lib.control import send_requests
+
+    names = args.names
+    if names == ["-"]:
+        names = list(x.strip() for x in sys.stdin if x.strip())
+    if args.command in ("trigger", "suspend", "unsuspend"):
+        if not names:
+            exit_error(CLI_ERR_CTL_NAMES_REQUIRED % args.command)
+        requests = list({"cmd": args.command, "name": x} for x in names)
+    elif args.command == "reset":
+        requests = [{"cmd": "reset", "names": names}]
+    elif args.command == "history":
+        request = {"cmd": "history", "limit": args.limit}
+        if names:
+            request["task"] = names[0]
+        requests = [request]
+    else:
+        requests = [{"cmd": args.command}]
+    if args.wait and args.command != "history":
+        for request in requests:
+            request["wait"] = True
+            if args.timeout is not None:
+                request["timeout"] = args.timeout
+    try:
+        replies = send_requests(get_control_socket_file(), requests)
+    except (OSError, ValueError):
+        exit_error(CLI_ERR_CTL_NOT_RUNNING)
+    failed = False
+    for request, reply in zip(requests, replies):
+        if not reply.get("ok"):
+            failed = True
+            what = " ".join(
+                [request["cmd"]] + ([request["name"]] if "name" in request else [])
+            )
+            write_error(
+                CLI_ERR_CTL_COMMAND_FAILED
+                % (what, reply.get("error") or CLI_ERR_CTL_REFUSED)
+            )
+        elif isinstance(reply.get("result"), list):
+            # print plain JSON, so that the output can be used by scripts
+            for entry in reply["result"]:
+                print(json.dumps(entry))
+    if failed or len(replies) < len(requests):
+        sys.exit(2)
+
+
 # toolbox: various utilities that can help build a proper setup
 def main_toolbox(args):
     AppConfig.delete("APPDATA")
@@ -529,9 +769,13 @@ def main_toolbox(args):
             write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--install-lua")
         if bool(args.upgrade_lua) and verbose:
             write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--upgrade-lua")
+        if args.rebuild_extras and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--rebuild-extras")
         from lib.toolbox.install_whenever import install
 
         if install(verbose=verbose):
+            # the binary has been replaced: probe it again when needed
+            invalidate_whenever_probes()
             if verbose:
                 console.print(CLI_MSG_OPERATION_FINISHED, highlight=False)
         else:
@@ -550,6 +794,8 @@ def main_toolbox(args):
             write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--install-lua")
         if bool(args.upgrade_lua) and verbose:
             write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--upgrade-lua")
+        if args.rebuild_extras and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--rebuild-extras")
         from lib.toolbox.create_shortcuts import create_shortcuts
 
         my_path = os.path.normpath(os.path.realpath(__file__))
@@ -575,6 +821,8 @@ def main_toolbox(args):
             write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--install-lua")
         if bool(args.upgrade_lua) and verbose:
             write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--upgrade-lua")
+        if args.rebuild_extras and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--rebuild-extras")
         retrieve_whenever_options()
         from lib.toolbox.fix_config import fix_config_file
 
@@ -600,6 +848,8 @@ def main_toolbox(args):
             write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--install-lua")
         if bool(args.upgrade_lua) and verbose:
             write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--upgrade-lua")
+        if args.rebuild_extras and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--rebuild-extras")
         retrieve_whenever_options()
         from lib.toolbox.check_config import check_config_file
 
@@ -625,6 +875,8 @@ def main_toolbox(args):
             write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--check-config")
         if bool(args.upgrade_lua) and verbose:
             write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--upgrade-lua")
+        if args.rebuild_extras and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--rebuild-extras")
         from lib.toolbox.install_lua import install_lua
 
         if install_lua(args.install_lua, verbose):
@@ -649,6 +901,8 @@ def main_toolbox(args):
             write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--check-config")
         if bool(args.install_lua) and verbose:
             write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--install-lua")
+        if args.rebuild_extras and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--rebuild-extras")
         from lib.toolbox.install_lua import upgrade_lua
 
         if upgrade_lua(args.upgrade_lua, verbose):
@@ -656,9 +910,56 @@ def main_toolbox(args):
                 console.print(CLI_MSG_OPERATION_FINISHED, highlight=False)
         else:
             exit_error(CLI_MSG_OPERATION_FAILED, verbose=verbose)
+
+    # rebuild the extra items manifest
+    elif args.rebuild_extras:
+        if args.install_whenever and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--install-whenever")
+        if args.desktop and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--desktop")
+        if args.autostart and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--autostart")
+        if args.create_icons and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--create-icons")
+        if args.fix_config and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--fix-config")
+        if args.check_config and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--check-config")
+        if bool(args.install_lua) and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--install-lua")
+        if bool(args.upgrade_lua) and verbose:
+            write_warning(CLI_ERR_UNSUPPORTED_SWITCH % "--upgrade-lua")
+        retrieve_whenever_options()
+        from lib.extra import get_manifest
+
+        manifest = get_manifest(rebuild=True)
+        if verbose:
+            for name, reason in manifest["not_loaded"].items():
+                write_warning(CLI_ERR_EXTRA_NOT_LOADED % (name, reason))
+            console.print(CLI_MSG_OPERATION_FINISHED, highlight=False)
     # ...
 
 
+# diag: run diagnostics and report the results; the `--child` switch is only
+# used internally, by the process that actually performs the measurements
+def main_diag(args):
+    AppConfig.delete("APPDATA")
+    AppConfig.set("APPDATA", args.dir_appdata)
+    AppConfig.delete("WHENEVER")
+    AppConfig.set("WHENEVER", args.whenever)
+    from lib.toolbox.diag_startup import diag_startup, run_child
+
+    if args.child:
+        run_child(check_prepare_features)
+    elif not diag_startup(
+        os.path.abspath(__file__),
+        check_prepare_features,
+        json_file=args.json,
+        top=args.top,
+    ):
+        exit_error(CLI_MSG_OPERATION_FAILED)
+
+
 # main program: perform CLI parsing and run the appropriate subcommand
 def main():
     global _root
@@ -704,6 +1005,84 @@ def main():
     )
     parser_start.set_defaults(func=main_start)
 
+    # parser for the `daemon` subcommand
+    parser_daemon = subparsers.add_parser("daemon", help=CLI_ARG_HELP_CMD_DAEMON)
+    parser_daemon.add_argument(
+        "-D",
+        "--dir-appdata",
+        help=CLI_ARG_HELP_DIR_APPDATA,
+        metavar="DIR",
+        type=str,
+        default=default_appdata,
+    )
+    parser_daemon.add_argument(
+        "-W",
+        "--whenever",
+        help=CLI_ARG_HELP_WHENEVER,
+        type=str,
+        default=default_whenever,
+    )
+    parser_daemon.add_argument(
+        "-L",
+        "--log-level",
+        help=CLI_ARG_HELP_LOGLEVEL,
+        type=str,
+        choices=["trace", "debug", "info", "warn", "error"],
+        default="info",
+    )
+    parser_daemon.set_defaults(func=main_daemon)
+
+    # parser for the `ctl` subcommand
+    parser_ctl = subparsers.add_parser("ctl", help=CLI_ARG_HELP_CMD_CTL)
+    parser_ctl.add_argument(
+        "command",
+        help=CLI_ARG_HELP_CTL_COMMAND,
+        choices=[
+            "pause",
+            "resume",
+            "reload",
+            "reset",
+            "trigger",
+            "suspend",
+            "unsuspend",
+            "history",
+        ],
+    )
+    parser_ctl.add_argument(
+        "names",
+        help=CLI_ARG_HELP_CTL_NAMES,
+        metavar="NAME",
+        nargs="*",
+    )
+    parser_ctl.add_argument(
+        "-D",
+        "--dir-appdata",
+        help=CLI_ARG_HELP_DIR_APPDATA,
+        metavar="DIR",
+        type=str,
+        default=default_appdata,
+    )
+    parser_ctl.add_argument(
+        "--limit",
+        help=CLI_ARG_HELP_CTL_LIMIT,
+        metavar="N",
+        type=int,
+        default=20,
+    )
+    parser_ctl.add_argument(
+        "-w",
+        "--wait",
+        help=CLI_ARG_HELP_CTL_WAIT,
+        action="store_true",
+    )
+    parser_ctl.add_argument(
+        "--timeout",
+        help=CLI_ARG_HELP_CTL_TIMEOUT,
+        metavar="SECONDS",
+        type=float,
+    )
+    parser_ctl.set_defaults(func=main_ctl)
+
     # parser for the `config` subcommand
     parser_config = subparsers.add_parser("config", help=CLI_ARG_HELP_CMD_CONFIG)
     parser_config.add_argument(
@@ -775,6 +1154,11 @@ def main():
         help=CLI_ARG_HELP_CHECKCONFIG,
         action="store_true",
     )
+    parser_toolbox.add_argument(
+        "--rebuild-extras",
+        help=CLI_ARG_HELP_REBUILD_EXTRAS,
+        action="store_true",
+    )
     parser_toolbox.add_argument(
         "--quiet",
         help=CLI_ARG_HELP_QUIET,
@@ -786,6 +1170,48 @@ def main():
     parser_version = subparsers.add_parser("version", help=CLI_ARG_HELP_CMD_VERSION)
     parser_version.set_defaults(func=main_version)
 
+    # parser for the `diag` subcommand
+    parser_diag = subparsers.add_parser("diag", help=CLI_ARG_HELP_CMD_DIAG)
+    parser_diag.add_argument(
+        "what",
+        help=CLI_ARG_HELP_DIAG_TOPIC,
+        choices=["startup"],
+    )
+    parser_diag.add_argument(
+        "-D",
+        "--dir-appdata",
+        help=CLI_ARG_HELP_DIR_APPDATA,
+        metavar="DIR",
+        type=str,
+        default=default_appdata,
+    )
+    parser_diag.add_argument(
+        "-W",
+        "--whenever",
+        help=CLI_ARG_HELP_WHENEVER,
+        type=str,
+        default=default_whenever,
+    )
+    parser_diag.add_argument(
+        "--json",
+        help=CLI_ARG_HELP_DIAG_JSON,
+        metavar="FILE",
+        type=str,
+    )
+    parser_diag.add_argument(
+        "--top",
+        help=CLI_ARG_HELP_DIAG_TOP,
+        metavar="N",
+        type=int,
+        default=20,
+    )
+    parser_diag.add_argument(
+        "--child",
+        help=argparse.SUPPRESS,
+        action="store_true",
+    )
+    parser_diag.set_defaults(func=main_diag)
+
     # all program functionality is split in the `main_[...]` functions above
     args = parser.parse_args()
     args.func(args)